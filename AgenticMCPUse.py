@@ -1,30 +1,29 @@
 import os
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters, types
-from mcp.client.stdio import stdio_client
+from mcp import ClientSession, types
+from mcp_transport import open_transport
+from llm_models import function_declarations, load_model
+from result_store import ResultStore, result_value
 import asyncio
-import google.generativeai as genai
 from concurrent.futures import TimeoutError
 from functools import partial
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini AI using API key from .env
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
-
-genai.configure(api_key=api_key)
-
-# Initialize the model
-model = genai.GenerativeModel('models/gemini-2.0-flash')
+# The model is created in main() (Gemini unless LLM_MODEL selects a scripted one)
+model = None
 
 # Initialize variables
 max_iterations = 3
 last_response = None
 iteration = 0
 iteration_response = []
+result_store = ResultStore()
+
+# FUNCTION_CALLING=native offers the tools as native function declarations (text protocol still accepted)
+function_calling = os.getenv("FUNCTION_CALLING", "text")
+tool_declarations = None
 
 async def generate_with_timeout(prompt, timeout=10):
     """Generate content with a timeout"""
@@ -35,7 +34,7 @@ async def generate_with_timeout(prompt, timeout=10):
         response = await asyncio.wait_for(
             loop.run_in_executor(
                 None, 
-                lambda: model.generate_content(prompt)
+                lambda: model.generate_content(prompt, tools=tool_declarations)
             ),
             timeout=timeout
         )
@@ -49,15 +48,14 @@ async def generate_with_timeout(prompt, timeout=10):
         raise
 
 async def main():
+    global model, tool_declarations
     print("Starting main execution...")
     try:
-        # Create server parameters for stdio connection
-        server_params = StdioServerParameters(
-            command="python3",
-            args=["mcp_server.py"]
-        )
+        if model is None:
+            model = load_model()
 
-        async with stdio_client(server_params) as (read, write):
+        # Connect over stdio, or in-process when MCP_TRANSPORT=memory
+        async with open_transport("mcp_server.py") as (read, write):
             print("Connection established, creating session...")
             async with ClientSession(read, write) as session:
                 print("Session created, initializing...")
@@ -110,6 +108,8 @@ async def main():
                     tools_description = "Error loading tools"
                 
                 print("Created system prompt...")
+                if function_calling == "native":
+                    tool_declarations = function_declarations(tools)
                 
                 system_prompt = f"""You are a text processing agent that can reverse strings. You have access to various text tools.
 
@@ -123,6 +123,7 @@ Respond with EXACTLY ONE of these formats:
    
    Example: For reverse_string(text: string), use:
    FUNCTION_CALL: reverse_string|hello
+   Large results are shown as a handle like $r1 with a preview; pass the handle as a parameter to reuse the full result.
 
 2. For final answers:
    FINAL_ANSWER: [text]
@@ -150,15 +151,19 @@ Make sure to provide parameters in the correct order as specified in the functio
                     try:
                         response = await generate_with_timeout(prompt)
                         response_text = response.text.strip()
-                        print(f"LLM Response: {response_text}")
+                        print(f"LLM Response: {response_text or response.function_calls}")
                     except Exception as e:
                         print(f"Failed to get LLM response: {e}")
                         break
 
-                    if response_text.startswith("FUNCTION_CALL:"):
-                        _, function_info = response_text.split(":", 1)
-                        parts = [p.strip() for p in function_info.split("|")]
-                        func_name, params = parts[0], parts[1:]
+                    if response.function_calls or response_text.startswith("FUNCTION_CALL:"):
+                        if response.function_calls:
+                            # Native function call: arguments arrive keyed by parameter name
+                            func_name, params = response.function_calls[0].name, response.function_calls[0].args
+                        else:
+                            _, function_info = response_text.split(":", 1)
+                            parts = [p.strip() for p in function_info.split("|")]
+                            func_name, params = parts[0], parts[1:]
                         
                         print(f"Calling function {func_name} with params {params}")
                         try:
@@ -169,25 +174,24 @@ Make sure to provide parameters in the correct order as specified in the functio
 
                             # Prepare arguments according to the tool's input schema
                             arguments = {}
-                            for (param_name, param_info), value in zip(tool.inputSchema['properties'].items(), params):
-                                arguments[param_name] = value
+                            if isinstance(params, dict):
+                                param_values = [(name, params[name]) for name in tool.inputSchema['properties'] if name in params]
+                            else:
+                                param_values = zip(tool.inputSchema['properties'], params)
+                            for param_name, value in param_values:
+                                # $rN handles are replaced by the stored result
+                                arguments[param_name] = result_store.get(value) if value in result_store else value
 
                             print(f"Executing MCP tool call with arguments: {arguments}")
                             result = await session.call_tool(func_name, arguments=arguments)
                             
-                            # Get the full result content
-                            if hasattr(result, 'content'):
-                                if isinstance(result.content[0], str):
-                                    iteration_result = result.content[0]
-                                else:
-                                    iteration_result = result.content[0].text
-                            else:
-                                iteration_result = str(result)
+                            # Large results stay in the result store; the prompt only gets a preview
+                            iteration_result = result_store.describe(result_value(result))
                                 
                             print(f"Full result received: {iteration_result}")
                             
                             iteration_response.append(
-                                f"In the {iteration + 1} iteration you called {func_name} with {arguments} parameters, "
+                                f"In the {iteration + 1} iteration you called {func_name} with {params} parameters, "
                                 f"and the function returned {iteration_result}."
                             )
                             last_response = iteration_result
@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import json
+import os
+import stat
+import sys
+import time
+
+from mcp import ClientSession
+from mcp_transport import load_module, open_transport
+# The daemon listens where launch_app.py --daemon connects
+from launch_app import daemon_socket_path
+
+
+class _SocketOutput:
+    """File-like object that sends each printed line to the client as {"output": line}"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.buffer = ""
+
+    def write(self, text):
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            self.writer.write((json.dumps({"output": line}) + "\n").encode())
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class AgentDaemon:
+    """Keeps the model, MCP session and system prompt of talk2mcp-2.py warm between queries
+
+    Each connection sends one JSON request line: {"query": ...} to run a query (with an
+    optional "priority": "batch" for the rate limiter),
+    {"command": "ping"} to check the daemon is ready or {"command": "stop"} to shut it
+    down. While a query runs, everything the agent prints is streamed back as
+    {"output": line}, followed by {"result": ...}. Queries run one at a time because the
+    agent keeps its per-query state in module globals.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or daemon_socket_path()
+        self.agent = load_module("talk2mcp-2.py")
+        self.lock = asyncio.Lock()
+        self.stopped = asyncio.Event()
+        self.started = time.time()
+        self.queries = 0
+
+    async def run(self):
+        start = time.perf_counter()
+        self.agent.model = self.agent.load_model()
+        async with open_transport("example2-3.py") as (read, write):
+            async with ClientSession(read, write) as session:
+                await self.agent.prepare_session(session)
+                self.session = session
+                self.remove_stale_socket()
+                server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+                print(f"Agent daemon ready on {self.socket_path} after {time.perf_counter() - start:.2f}s")
+                try:
+                    async with server:
+                        await self.stopped.wait()
+                finally:
+                    self.remove_stale_socket()
+
+    def remove_stale_socket(self):
+        """Remove a socket left at socket_path, but never a file of any other kind"""
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{self.socket_path} exists and is not a socket")
+        os.unlink(self.socket_path)
+
+    async def handle_client(self, reader, writer):
+        try:
+            request = json.loads(await reader.readline())
+            if request.get("command") == "stop":
+                response = {"stopped": True}
+                self.stopped.set()
+            elif request.get("command") == "ping":
+                response = {"ready": True, "uptime_s": time.time() - self.started, "queries": self.queries}
+            else:
+                priority = request.get("priority", "interactive")
+                response = {"result": await self.answer(request["query"], writer, priority)}
+        except Exception as e:
+            response = {"error": str(e)}
+        writer.write((json.dumps(response) + "\n").encode())
+        await writer.drain()
+        writer.close()
+
+    async def answer(self, query, writer, priority="interactive"):
+        async with self.lock:
+            self.queries += 1
+            output = _SocketOutput(writer)
+            with contextlib.redirect_stdout(output):
+                return await self.agent.answer_query(self.session, query, priority)
+
+
+if __name__ == "__main__":
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else None
+    asyncio.run(AgentDaemon(socket_path).run())
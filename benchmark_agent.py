@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import statistics
+import sys
+import time
+
+from mcp import ClientSession
+from llm_models import ScriptedModel, function_declarations
+from mcp_transport import TRANSPORTS, load_module, open_transport
+from tool_index import ToolIndex
+
+# Fixed corpus of queries with the responses a model gave for them: for the FUNCTION_CALL: text
+# protocol, for native function calling where they differ, and for plan mode
+CORPUS = [
+    {
+        "name": "add",
+        "query": "Add 2 and 3",
+        "expected": [5],
+        "responses": ["FUNCTION_CALL: add|2|3", "FINAL_ANSWER: [5]"],
+        "native_responses": [{"function_call": {"name": "add", "args": {"a": 2, "b": 3}}}, "FINAL_ANSWER: [5]"],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"sum\", \"tool\": \"add\", \"args\": {\"a\": 2, \"b\": 3}}]}"],
+    },
+    {
+        "name": "power",
+        "query": "What is 2 to the power of 10?",
+        "expected": [1024],
+        "responses": ["FUNCTION_CALL: power|2|10", "FINAL_ANSWER: [1024]"],
+        "native_responses": [{"function_call": {"name": "power", "args": {"a": 2, "b": 10}}}, "FINAL_ANSWER: [1024]"],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"p\", \"tool\": \"power\", \"args\": {\"a\": 2, \"b\": 10}}]}"],
+    },
+    {
+        "name": "factorial",
+        "query": "Find the factorial of 20",
+        "expected": [2432902008176640000],
+        # Text-protocol replies sometimes use call syntax instead of pipes
+        "responses": ["FUNCTION_CALL: factorial(20)", "FUNCTION_CALL: factorial|20", "FINAL_ANSWER: [2432902008176640000]"],
+        "native_responses": [
+            {"function_call": {"name": "factorial", "args": {"a": 20}}},
+            "FINAL_ANSWER: [2432902008176640000]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"f\", \"tool\": \"factorial\", \"args\": {\"a\": 20}}]}"],
+    },
+    {
+        "name": "add_list",
+        "query": "Add all of these numbers: 1, 2, 3, 4, 5",
+        "expected": [15],
+        # ... or wrap the call in an explanation over several lines
+        "responses": [
+            "I will add the numbers.\nFUNCTION_CALL: add_list|[1, 2, 3, 4, 5]",
+            "FUNCTION_CALL: add_list|[1, 2, 3, 4, 5]",
+            "FINAL_ANSWER: [15]",
+        ],
+        "native_responses": [{"function_call": {"name": "add_list", "args": {"l": [1, 2, 3, 4, 5]}}}, "FINAL_ANSWER: [15]"],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"sum\", \"tool\": \"add_list\", \"args\": {\"l\": [1, 2, 3, 4, 5]}}]}"],
+    },
+    {
+        "name": "fibonacci",
+        "query": "Give me the first 20 Fibonacci numbers",
+        "expected": [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610, 987, 1597, 2584, 4181],
+        "responses": ["FUNCTION_CALL: fibonacci_numbers|20", "FINAL_ANSWER: [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610, 987, 1597, 2584, 4181]"],
+        "native_responses": [
+            {"function_call": {"name": "fibonacci_numbers", "args": {"n": 20}}},
+            "FINAL_ANSWER: [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610, 987, 1597, 2584, 4181]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"fib\", \"tool\": \"fibonacci_numbers\", \"args\": {\"n\": 20}}]}"],
+    },
+    {
+        "name": "ascii",
+        "query": "Find the ASCII values of the characters in INDIA",
+        "expected": [73, 78, 68, 73, 65],
+        "responses": ["FUNCTION_CALL: strings_to_chars_to_int|INDIA", "FINAL_ANSWER: [73, 78, 68, 73, 65]"],
+        "native_responses": [
+            {"function_call": {"name": "strings_to_chars_to_int", "args": {"string": "INDIA"}}},
+            "FINAL_ANSWER: [73, 78, 68, 73, 65]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"ascii\", \"tool\": \"strings_to_chars_to_int\", \"args\": {\"string\": \"INDIA\"}}]}"],
+    },
+    {
+        "name": "exponential_sum",
+        "query": "Calculate the sum of exponentials of 73, 78, 68, 73 and 65",
+        "expected": [7.599822246093079e+33],
+        "responses": [
+            "FUNCTION_CALL: int_list_to_exponential_sum|[73, 78, 68, 73, 65]",
+            "FINAL_ANSWER: [7.599822246093079e+33]",
+        ],
+        "native_responses": [
+            {"function_call": {"name": "int_list_to_exponential_sum", "args": {"int_list": [73, 78, 68, 73, 65]}}},
+            "FINAL_ANSWER: [7.599822246093079e+33]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"total\", \"tool\": \"int_list_to_exponential_sum\", \"args\": {\"int_list\": [73, 78, 68, 73, 65]}}]}"],
+    },
+    {
+        "name": "ascii_exp_sum",
+        "query": "Find the ASCII values of the characters in INDIA and then the sum of exponentials of those values",
+        "expected": [7.599822246093079e+33],
+        "responses": [
+            "FUNCTION_CALL: strings_to_chars_to_int|INDIA",
+            "FUNCTION_CALL: int_list_to_exponential_sum|[73, 78, 68, 73, 65]",
+            "FINAL_ANSWER: [7.599822246093079e+33]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"ascii\", \"tool\": \"strings_to_chars_to_int\", \"args\": {\"string\": \"INDIA\"}}, {\"id\": \"total\", \"tool\": \"int_list_to_exponential_sum\", \"args\": {\"int_list\": \"$ascii\"}}], \"answer\": \"$total\"}"],
+    },
+    {
+        "name": "independent_steps",
+        "query": "Add the factorial of 5 and 2 to the power of 10",
+        "expected": [1144],
+        # One step per LLM call needs four calls, one more than max_iterations allows
+        "responses": ["FUNCTION_CALL: factorial|5", "FUNCTION_CALL: power|2|10", "FUNCTION_CALL: add|120|1024", "FINAL_ANSWER: [1144]"],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"f\", \"tool\": \"factorial\", \"args\": {\"a\": 5}}, {\"id\": \"p\", \"tool\": \"power\", \"args\": {\"a\": 2, \"b\": 10}}, {\"id\": \"sum\", \"tool\": \"add\", \"args\": {\"a\": \"$f\", \"b\": \"$p\"}}], \"answer\": \"$sum\"}"],
+    },
+    {
+        "name": "expression",
+        "query": "What is (3^4 + sqrt(16)) % 7?",
+        "expected": [1.0],
+        "responses": ["FUNCTION_CALL: evaluate|(3^4 + sqrt(16)) % 7", "FINAL_ANSWER: [1.0]"],
+        "native_responses": [
+            {"function_call": {"name": "evaluate", "args": {"expression": "(3^4 + sqrt(16)) % 7"}}},
+            "FINAL_ANSWER: [1.0]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"value\", \"tool\": \"evaluate\", \"args\": {\"expression\": \"(3^4 + sqrt(16)) % 7\"}}]}"],
+    },
+    {
+        "name": "unknown_tool",
+        "query": "Square root of 49",
+        "expected": [7.0],
+        # A guessed tool name, corrected once the error comes back
+        "responses": ["FUNCTION_CALL: square_root|49", "FUNCTION_CALL: sqrt|49", "FINAL_ANSWER: [7.0]"],
+        "native_responses": [
+            {"function_call": {"name": "square_root", "args": {"a": 49}}},
+            {"function_call": {"name": "sqrt", "args": {"a": 49}}},
+            "FINAL_ANSWER: [7.0]",
+        ],
+        "plan_responses": [
+            "PLAN: {\"steps\": [{\"id\": \"root\", \"tool\": \"square_root\", \"args\": {\"a\": 49}}]}",
+            "PLAN: {\"steps\": [{\"id\": \"root\", \"tool\": \"sqrt\", \"args\": {\"a\": 49}}]}",
+        ],
+    },
+    {
+        "name": "fibonacci_sum",
+        "query": "Add up the first 100 Fibonacci numbers",
+        "expected": [573147844013817084100],
+        # The 100 numbers come back as a $r1 handle with a preview, and the handle is passed on
+        "responses": [
+            "FUNCTION_CALL: fibonacci_numbers|100",
+            "FUNCTION_CALL: add_list|$r1",
+            "FINAL_ANSWER: [573147844013817084100]",
+        ],
+        "native_responses": [
+            {"function_call": {"name": "fibonacci_numbers", "args": {"n": 100}}},
+            {"function_call": {"name": "add_list", "args": {"l": "$r1"}}},
+            "FINAL_ANSWER: [573147844013817084100]",
+        ],
+        "plan_responses": ["PLAN: {\"steps\": [{\"id\": \"fib\", \"tool\": \"fibonacci_numbers\", \"args\": {\"n\": 100}}, {\"id\": \"total\", \"tool\": \"add_list\", \"args\": {\"l\": \"$fib\"}}], \"answer\": \"$total\"}"],
+    },
+    {
+        "name": "direct_answer",
+        "query": "What is 2 + 2? You may answer directly.",
+        "expected": [4],
+        "responses": ["FINAL_ANSWER: [4]"],
+    },
+]
+
+
+async def run_query(agent, session, case, latency, chunk_latency=0.0):
+    """Run one corpus query through handle_math_query against a fresh scripted model"""
+    agent.reset_state()
+    responses = case["responses"]
+    if agent.agent_mode == "plan":
+        responses = case.get("plan_responses", responses)
+    elif agent.function_calling == "native":
+        responses = case.get("native_responses", responses)
+    agent.model = ScriptedModel(responses, latency=latency, chunk_latency=chunk_latency)
+    start = time.perf_counter()
+    result = await agent.handle_math_query(session, case["query"], priority="batch")
+    elapsed = time.perf_counter() - start
+    prompts = agent.model.prompts
+    # Native function declarations go out with every prompt, so they count as prompt bytes
+    declarations = [json.dumps(tools) for tools in agent.model.declarations if tools]
+    return {
+        "case": case["name"],
+        "result": result,
+        "correct": is_correct(result, case["expected"]),
+        "iterations": len(prompts),
+        "wall_time_s": elapsed,
+        "prompt_bytes": sum(len(text.encode()) for text in prompts + declarations),
+    }
+
+
+def answer_values(answer):
+    """The numbers in a FINAL_ANSWER: [...] line, or None if it holds anything else"""
+    text = answer.removeprefix("FINAL_ANSWER:").strip()
+    while text.startswith("[") and text.endswith("]"):
+        text = text[1:-1].strip()
+    values = []
+    for item in text.split(","):
+        try:
+            values.append(int(item))
+        except ValueError:
+            try:
+                values.append(float(item))
+            except ValueError:
+                return None
+    return values
+
+
+def is_correct(answer, expected):
+    """Whether the agent's answer matches the case's expected values"""
+    values = answer_values(answer)
+    if values is None or len(values) != len(expected):
+        return False
+    return all(
+        value == want if isinstance(want, int) else math.isclose(value, want, rel_tol=1e-9)
+        for value, want in zip(values, expected)
+    )
+
+
+def expected_tools(case, tool_names):
+    """The existing tools a case's text-protocol replies call"""
+    names = [response.split(":", 1)[1].split("|")[0].split("(")[0].strip() for response in case["responses"]]
+    return {name for name in names if name in tool_names}
+
+
+def summarize(runs):
+    """Average the repeated runs of one query"""
+    return {
+        "case": runs[0]["case"],
+        "result": runs[-1]["result"],
+        "correct": statistics.mean(run["correct"] for run in runs),
+        "runs": len(runs),
+        "iterations": statistics.mean(run["iterations"] for run in runs),
+        "wall_time_s": statistics.mean(run["wall_time_s"] for run in runs),
+        "prompt_bytes": statistics.mean(run["prompt_bytes"] for run in runs),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="End-to-end agent benchmark against a scripted model")
+    parser.add_argument("--transport", default="memory", choices=TRANSPORTS)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="simulated seconds per streamed chunk")
+    parser.add_argument("--stream", action="store_true", help="stream text-protocol replies (LLM_STREAM=1)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--function-calling", nargs="+", default=["text", "native"], choices=["text", "native"])
+    parser.add_argument("--agent-mode", nargs="+", default=["iterative", "plan"], choices=["iterative", "plan"])
+    parser.add_argument("--top-k", nargs="+", type=int, default=[0, 5], help="tools listed per prompt, 0 for all")
+    parser.add_argument("--verbose", action="store_true", help="show the agent's own output")
+    parser.add_argument("--output", default="bench_agent.json")
+    args = parser.parse_args()
+
+    agent = load_module("talk2mcp-2.py")
+    agent.streaming = args.stream
+    modes = []
+    async with open_transport("example2-3.py", args.transport) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            agent.tools = (await session.list_tools()).tools
+            agent.tool_index = ToolIndex(agent.tools)
+            tool_names = {tool.name for tool in agent.tools}
+
+            # Plan mode reads PLAN: text replies, so it runs once rather than per function-calling mode
+            configs = []
+            if "iterative" in args.agent_mode:
+                configs.extend(("iterative", mode) for mode in args.function_calling)
+            if "plan" in args.agent_mode:
+                configs.append(("plan", "text"))
+            configs = [(agent_mode, mode, top_k) for agent_mode, mode in configs for top_k in args.top_k]
+
+            for agent_mode, mode, top_k in configs:
+                print(f"\n=== agent mode: {agent_mode}, function calling: {mode}, top-k tools: {top_k or 'all'} ===")
+                agent.tool_top_k = top_k
+                agent.agent_mode = agent_mode
+                agent.function_calling = mode
+                agent.tool_declarations = function_declarations(agent.tools) if mode == "native" else None
+                agent.system_prompt = agent.build_system_prompt(agent.tools)
+                for key in agent.query_stats:
+                    agent.query_stats[key] = 0
+
+                results = []
+                for case in CORPUS:
+                    runs = []
+                    for _ in range(args.repeat):
+                        output = sys.stdout if args.verbose else io.StringIO()
+                        with contextlib.redirect_stdout(output):
+                            runs.append(await run_query(agent, session, case, args.latency, args.chunk_latency))
+                    summary = summarize(runs)
+                    expected = expected_tools(case, tool_names)
+                    if top_k and expected:
+                        selected = {tool.name for tool in agent.tool_index.search(case["query"], top_k)}
+                        summary["tool_recall"] = len(expected & selected) / len(expected)
+                    results.append(summary)
+                    print(
+                        f"{summary['case']:<16} {'ok' if summary['correct'] == 1 else 'WRONG':<5} "
+                        f"iterations {summary['iterations']:.1f}  "
+                        f"{summary['wall_time_s'] * 1000:8.2f} ms  {summary['prompt_bytes']:8.0f} prompt bytes"
+                    + (f"  tool recall {summary['tool_recall']:.0%}" if "tool_recall" in summary else "")
+                    )
+
+                stats = agent.agent_stats()
+                # The agent counts any non-error answer as solved; here only correct answers count
+                solved = [r for r in results if r["correct"] == 1]
+                totals = {
+                    "solved": len(solved),
+                    "avg_iterations_per_solved": (
+                        sum(r["iterations"] for r in solved) / len(solved) if solved else 0.0
+                    ),
+                    "iterations": sum(r["iterations"] for r in results),
+                    "wall_time_s": sum(r["wall_time_s"] for r in results),
+                    "prompt_bytes": sum(r["prompt_bytes"] for r in results),
+                }
+                print(f"total {totals['prompt_bytes']:.0f} prompt bytes, {totals['wall_time_s'] * 1000:.2f} ms")
+                print(
+                    f"{totals['solved']}/{len(results)} solved correctly, "
+                    f"{totals['avg_iterations_per_solved']:.2f} iterations per solved query, "
+                    f"parse failure rate {stats['parse_failure_rate']:.1%}, "
+                    f"first tool call after {stats['avg_time_to_first_tool_call_s'] * 1000:.2f} ms"
+                )
+                modes.append({
+                    "agent_mode": agent_mode,
+                    "function_calling": mode,
+                    "top_k": top_k,
+                    "results": results,
+                    "agent_stats": stats,
+                    "totals": totals,
+                })
+
+    report = {
+        "benchmark": "agent_end_to_end",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "transport": args.transport,
+        "latency_s": args.latency,
+        "chunk_latency_s": args.chunk_latency,
+        "streaming": args.stream,
+        "modes": modes,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(modes)} modes to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
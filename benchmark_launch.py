@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from launch_app import daemon_running, runtime_dir, send_request
+
+QUERY = "Add 2 and 3"
+RESPONSES = ["FUNCTION_CALL: add|2|3", "FINAL_ANSWER: [5]"]
+
+
+def time_to_answer(command, stdin_text=None, env=None):
+    """Seconds from starting `command` until it prints its Result: line"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env,
+    )
+    if stdin_text:
+        process.stdin.write(stdin_text)
+        process.stdin.flush()
+    for line in process.stdout:
+        if line.startswith("Result:"):
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        raise RuntimeError(f"{' '.join(command)} exited without printing a result")
+    process.stdin.close()
+    process.wait()
+    return elapsed
+
+
+def summarize(times):
+    return {
+        "runs": len(times),
+        "mean_s": statistics.mean(times),
+        "p50_s": statistics.median(times),
+        "min_s": min(times),
+        "max_s": max(times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first answer: fresh talk2mcp-2.py vs the warm daemon")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--output", default="bench_launch.json")
+    args = parser.parse_args()
+
+    # Both sides replay the same scripted replies; the daemon's model needs one set per query
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(RESPONSES * (args.repeat + 1), f)
+    socket_path = os.path.join(runtime_dir(), f"bench-agent-{os.getpid()}.sock")
+    env = {
+        **os.environ,
+        "LLM_MODEL": f"scripted:{f.name}",
+        "LLM_LATENCY": str(args.latency),
+        "AGENT_SOCKET": socket_path,
+    }
+
+    print("Cold: a new talk2mcp-2.py per query")
+    cold = [
+        time_to_answer([sys.executable, "talk2mcp-2.py"], f"{QUERY}\nquit\n", env)
+        for _ in range(args.repeat)
+    ]
+    print(f"  {statistics.mean(cold) * 1000:.0f} ms to first answer")
+
+    print("Warm: launch_app.py --daemon against a running agent daemon")
+    os.environ["AGENT_SOCKET"] = socket_path
+    start = time.perf_counter()
+    daemon = subprocess.Popen(
+        [sys.executable, "agent_daemon.py", socket_path], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while not daemon_running():
+            if daemon.poll() is not None:
+                raise RuntimeError("Agent daemon exited during startup")
+            time.sleep(0.05)
+        startup = time.perf_counter() - start
+        warm = [
+            time_to_answer([sys.executable, "launch_app.py", "--daemon", "--query", QUERY], env=env)
+            for _ in range(args.repeat)
+        ]
+        print(f"  {statistics.mean(warm) * 1000:.0f} ms to first answer (daemon startup {startup * 1000:.0f} ms)")
+    finally:
+        send_request({"command": "stop"})
+        daemon.wait()
+        os.unlink(f.name)
+
+    report = {
+        "benchmark": "launch_time_to_first_answer",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "transport": os.getenv("MCP_TRANSPORT", "stdio"),
+        "latency_s": args.latency,
+        "query": QUERY,
+        "cold": summarize(cold),
+        "warm": {**summarize(warm), "daemon_startup_s": startup},
+        "speedup": statistics.mean(cold) / statistics.mean(warm),
+    }
+    with open(args.output, "w") as out:
+        json.dump(report, out, indent=2)
+    print(f"Speedup {report['speedup']:.1f}x; wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+from importlib.metadata import version
+
+from mcp import ClientSession
+from mcp_transport import TRANSPORTS, open_transport
+
+# Servers and the tools exercised on each of them
+CALCULATOR = "example2-3.py"
+REVERSER = "mcp_server.py"
+
+
+def build_cases(list_sizes):
+    """Return the (name, server script, tool, arguments) combinations to benchmark"""
+    cases = [("add", CALCULATOR, "add", {"a": 2, "b": 3})]
+    for size in list_sizes:
+        cases.append((f"add_list[{size}]", CALCULATOR, "add_list", {"l": list(range(size))}))
+    cases.append(("strings_to_chars_to_int", CALCULATOR, "strings_to_chars_to_int", {"string": "INDIA"}))
+    cases.append(("reverse_string", REVERSER, "reverse_string", {"text": "Hello World"}))
+    return cases
+
+
+def _wire_size(message):
+    """Bytes a message occupies as a newline-delimited JSON-RPC frame
+
+    This is exact for stdio; for HTTP it is the JSON-RPC payload without HTTP headers.
+    """
+    if isinstance(message, Exception):
+        return 0
+    return len(message.message.model_dump_json(by_alias=True, exclude_none=True).encode()) + 1
+
+
+class _CountingReadStream:
+    """Wrap a session read stream and count the bytes of every message received"""
+
+    def __init__(self, stream, counter):
+        self._stream = stream
+        self._counter = counter
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._stream.__aexit__(*exc_info)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self._stream.__anext__()
+        self._counter["received"] += _wire_size(message)
+        return message
+
+
+class _CountingWriteStream:
+    """Wrap a session write stream and count the bytes of every message sent"""
+
+    def __init__(self, stream, counter):
+        self._stream = stream
+        self._counter = counter
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._stream.__aexit__(*exc_info)
+
+    async def send(self, message):
+        self._counter["sent"] += _wire_size(message)
+        await self._stream.send(message)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def measure_bytes(transport, script, tool, arguments):
+    """Bytes sent and received for a single call, excluding the initialize handshake"""
+    counter = {"sent": 0, "received": 0}
+    async with open_transport(script, transport) as (read, write):
+        async with ClientSession(
+            _CountingReadStream(read, counter), _CountingWriteStream(write, counter)
+        ) as session:
+            await session.initialize()
+            counter["sent"] = counter["received"] = 0
+            await session.call_tool(tool, arguments=arguments)
+    return dict(counter)
+
+
+async def measure_throughput(session, tool, arguments, calls, concurrency):
+    """Issue `calls` tool calls with at most `concurrency` in flight and time each one"""
+    latencies = []
+    remaining = calls
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            result = await session.call_tool(tool, arguments=arguments)
+            latencies.append(time.perf_counter() - start)
+            if result.isError:
+                raise RuntimeError(f"{tool} failed: {result.content}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "elapsed_s": elapsed,
+        "calls_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run_transport(transport, cases, calls, concurrency_levels, warmup):
+    """Benchmark every case over one transport, one session per server script"""
+    results = []
+    for script in dict.fromkeys(case[1] for case in cases):
+        script_cases = [case for case in cases if case[1] == script]
+        async with open_transport(script, transport) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for name, _, tool, arguments in script_cases:
+                    for _ in range(warmup):
+                        await session.call_tool(tool, arguments=arguments)
+                    for concurrency in concurrency_levels:
+                        stats = await measure_throughput(session, tool, arguments, calls, concurrency)
+                        stats.update({"transport": transport, "case": name, "concurrency": concurrency})
+                        results.append(stats)
+                        print(
+                            f"{transport:>6} {name:<26} c={concurrency:<3} "
+                            f"{stats['calls_per_sec']:>9.1f} calls/s  "
+                            f"p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms"
+                        )
+        # Byte counts do not depend on concurrency, so measure them once per case
+        for name, _, tool, arguments in script_cases:
+            wire = await measure_bytes(transport, script, tool, arguments)
+            for stats in results:
+                if stats["case"] == name:
+                    stats["bytes_sent_per_call"] = wire["sent"]
+                    stats["bytes_received_per_call"] = wire["received"]
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure raw MCP tool-call overhead per transport")
+    parser.add_argument("--transports", nargs="+", default=list(TRANSPORTS), choices=TRANSPORTS)
+    parser.add_argument("--calls", type=int, default=200, help="calls per case and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--list-sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--cases", nargs="+", help="only run cases whose name starts with one of these")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", default="bench_transports.json")
+    args = parser.parse_args()
+
+    # httpx logs every HTTP request at INFO, which would swamp the HTTP timings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    cases = build_cases(args.list_sizes)
+    if args.cases:
+        cases = [case for case in cases if case[0].startswith(tuple(args.cases))]
+    results = []
+    for transport in args.transports:
+        results.extend(await run_transport(transport, cases, args.calls, args.concurrency, args.warmup))
+
+    report = {
+        "benchmark": "mcp_transports",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "mcp": version("mcp"),
+        "platform": platform.platform(),
+        "calls": args.calls,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+import math
+from collections import Counter
+
+# NumPy is optional; without it the same results come from plain bytes and Counter
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AGGREGATES = ("sum", "exp_sum", "histogram")
+_CODE_RANGE_ERROR = "Character codes must be integers between 0 and 1114111"
+
+
+def codes_from_bytes(data):
+    """Character codes of UTF-8 `data`; ASCII data is viewed in place rather than copied"""
+    if data.isascii():
+        return np.frombuffer(memoryview(data), dtype=np.uint8) if np is not None else data
+    return text_codes(bytes(data).decode("utf-8"))
+
+
+def text_codes(text):
+    """Character codes (the ord() of every character) of a string"""
+    if text.isascii():
+        return codes_from_bytes(text.encode("ascii"))
+    # UTF-32 stores each character as its code point
+    data = text.encode("utf-32-le")
+    if np is not None:
+        return np.frombuffer(memoryview(data), dtype="<u4")
+    return [ord(char) for char in text]
+
+
+def codes_text(codes):
+    """The string whose character codes are `codes`, the inverse of text_codes()"""
+    if np is None:
+        if not all(isinstance(code, int) and 0 <= code <= 0x10FFFF for code in codes):
+            raise ValueError(_CODE_RANGE_ERROR)
+        return "".join(map(chr, codes))
+    codes = np.asarray(codes)
+    if codes.size == 0:
+        return ""
+    if codes.dtype.kind not in "iu" or codes.min() < 0 or codes.max() > 0x10FFFF:
+        raise ValueError(_CODE_RANGE_ERROR)
+    if codes.max() < 128:
+        return codes.astype(np.uint8).tobytes().decode("ascii")
+    return codes.astype("<u4").tobytes().decode("utf-32-le")
+
+
+def code_counts(codes):
+    """{code: count} for every code that occurs, from one counting pass"""
+    if np is None:
+        return dict(Counter(codes))
+    counts = np.bincount(codes)
+    present = np.flatnonzero(counts)
+    return dict(zip(present.tolist(), counts[present].tolist()))
+
+
+def aggregate_codes(codes, aggregates):
+    """Sum, sum of exponentials and histogram of the codes, all from a single counting pass
+
+    The sums run over distinct codes weighted by their counts, so exp() is evaluated at
+    most once per distinct character however long the text is.
+    """
+    unknown = set(aggregates) - set(AGGREGATES)
+    if unknown:
+        raise ValueError(f"Unknown aggregate(s) {', '.join(sorted(unknown))}; choose from {', '.join(AGGREGATES)}")
+    counts = code_counts(codes)
+    results = {}
+    if "sum" in aggregates:
+        results["sum"] = sum(code * count for code, count in counts.items())
+    if "exp_sum" in aggregates:
+        results["exp_sum"] = math.fsum(math.exp(code) * count for code, count in counts.items())
+    if "histogram" in aggregates:
+        results["histogram"] = dict(sorted(counts.items()))
+    return results
+
+
+def codes_list(codes):
+    """Codes as a plain list of ints for a tool result"""
+    return codes.tolist() if np is not None and isinstance(codes, np.ndarray) else list(codes)
@@ -9,124 +9,135 @@ import sys
 import subprocess
 import time
 import os
+import json
 from Foundation import NSBundle
 from AppKit import NSWorkspace, NSApplication, NSApp
 from ScriptingBridge import SBApplication
 from Quartz import CGWindowListCopyWindowInfo, kCGWindowListOptionOnScreenOnly, kCGNullWindowID
+from tool_tracing import tracer_from_env
+from tool_cache import cache_from_env
+from sequence_pages import FibonacciPager, file_chars_page
+from char_codes import aggregate_codes, codes_from_bytes, codes_list, codes_text, text_codes
+from expression_eval import evaluate as evaluate_expression, evaluate_many as evaluate_expression_many
 
 # instantiate an MCP server client
 mcp = FastMCP("Calculator")
 
+# Results of tools marked @tool_cache.pure are memoized in a bounded LRU (see stats://cache).
+# Only deterministic tools without side effects may be marked; add, subtract and the
+# like are cheaper than hashing their arguments, so they are left out
+tool_cache = cache_from_env()
+
 # DEFINE TOOLS
 
 #addition tool
 @mcp.tool()
 def add(a: int, b: int) -> int:
     """Add two numbers"""
-    print("CALLED: add(a: int, b: int) -> int:")
     return int(a + b)
 
 @mcp.tool()
 def add_list(l: list) -> int:
     """Add all numbers in a list"""
-    print("CALLED: add(l: list) -> int:")
     return sum(l)
 
 # subtraction tool
 @mcp.tool()
 def subtract(a: int, b: int) -> int:
     """Subtract two numbers"""
-    print("CALLED: subtract(a: int, b: int) -> int:")
     return int(a - b)
 
 # multiplication tool
 @mcp.tool()
 def multiply(a: int, b: int) -> int:
     """Multiply two numbers"""
-    print("CALLED: multiply(a: int, b: int) -> int:")
     return int(a * b)
 
 #  division tool
 @mcp.tool() 
 def divide(a: int, b: int) -> float:
     """Divide two numbers"""
-    print("CALLED: divide(a: int, b: int) -> float:")
     return float(a / b)
 
 # power tool
 @mcp.tool()
+@tool_cache.pure
 def power(a: int, b: int) -> int:
     """Power of two numbers"""
-    print("CALLED: power(a: int, b: int) -> int:")
     return int(a ** b)
 
 # square root tool
 @mcp.tool()
 def sqrt(a: int) -> float:
     """Square root of a number"""
-    print("CALLED: sqrt(a: int) -> float:")
     return float(a ** 0.5)
 
 # cube root tool
 @mcp.tool()
 def cbrt(a: int) -> float:
     """Cube root of a number"""
-    print("CALLED: cbrt(a: int) -> float:")
     return float(a ** (1/3))
 
 # factorial tool
 @mcp.tool()
+@tool_cache.pure
 def factorial(a: int) -> int:
     """factorial of a number"""
-    print("CALLED: factorial(a: int) -> int:")
     return int(math.factorial(a))
 
 # log tool
 @mcp.tool()
+@tool_cache.pure
 def log(a: int) -> float:
     """log of a number"""
-    print("CALLED: log(a: int) -> float:")
     return float(math.log(a))
 
 # remainder tool
 @mcp.tool()
 def remainder(a: int, b: int) -> int:
     """remainder of two numbers divison"""
-    print("CALLED: remainder(a: int, b: int) -> int:")
     return int(a % b)
 
 # sin tool
 @mcp.tool()
 def sin(a: int) -> float:
     """sin of a number"""
-    print("CALLED: sin(a: int) -> float:")
     return float(math.sin(a))
 
 # cos tool
 @mcp.tool()
 def cos(a: int) -> float:
     """cos of a number"""
-    print("CALLED: cos(a: int) -> float:")
     return float(math.cos(a))
 
 # tan tool
 @mcp.tool()
 def tan(a: int) -> float:
     """tan of a number"""
-    print("CALLED: tan(a: int) -> float:")
     return float(math.tan(a))
 
 # mine tool
 @mcp.tool()
 def mine(a: int, b: int) -> int:
     """special mining tool"""
-    print("CALLED: mine(a: int, b: int) -> int:")
     return int(a - b - b)
 
+# expression tool
+@mcp.tool()
+@tool_cache.pure
+def evaluate(expression: str, variables: dict | None = None) -> float:
+    """Evaluate an arithmetic expression like (3^4 + sqrt(16)) % 7 in one call. Supports + - * / % ^, sqrt, cbrt, factorial, log, sin, cos, tan, exp, pi, e and named variables"""
+    return evaluate_expression(expression, variables)
+
+@mcp.tool()
+@tool_cache.pure
+def evaluate_many(expression: str, bindings: list[dict]) -> list:
+    """Evaluate one expression for each set of variable values in bindings, e.g. x^2 + y with [{"x": 1, "y": 2}, {"x": 3, "y": 4}]"""
+    return evaluate_expression_many(expression, bindings)
+
 @mcp.tool()
 def create_thumbnail(image_path: str, size: int = 100) -> str:
     """Create a thumbnail from an image and add it to Freeform"""
-    print("CALLED: create_thumbnail(image_path: str, size: int = 100) -> str:")
     try:
         # Open and resize the image
         img = PILImage.open(image_path)
@@ -151,21 +162,42 @@ def create_thumbnail(image_path: str, size: int = 100) -> str:
         return f"Error creating thumbnail: {str(e)}"
 
 @mcp.tool()
+@tool_cache.pure
 def strings_to_chars_to_int(string: str) -> list[int]:
     """Return the ASCII values of the characters in a word"""
-    print("CALLED: strings_to_chars_to_int(string: str) -> list[int]:")
-    return [int(ord(char)) for char in string]
+    return codes_list(text_codes(string))
+
+@mcp.tool()
+def string_codes(string: str, aggregates: list[str] | None = None, include_codes: bool = True) -> dict:
+    """Return the ASCII values (character codes) of a string together with aggregates of them computed in the same call: "sum", "exp_sum" (sum of exponentials) and "histogram" (count per code). Set include_codes to false to get only the aggregates of a long text"""
+    codes = text_codes(string)
+    result = aggregate_codes(codes, aggregates or [])
+    if include_codes:
+        result["codes"] = codes_list(codes)
+    return result
+
+@mcp.tool()
+def file_codes(path: str, aggregates: list[str]) -> dict:
+    """Return aggregates of the character codes of a UTF-8 text file: "sum", "exp_sum" (sum of exponentials) and "histogram" (count per code)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return aggregate_codes(codes_from_bytes(data), aggregates)
+
+@mcp.tool()
+def codes_to_string(codes: list[int]) -> str:
+    """Return the string whose characters have these ASCII values (character codes), the inverse of strings_to_chars_to_int"""
+    return codes_text(codes)
 
 @mcp.tool()
+@tool_cache.pure
 def int_list_to_exponential_sum(int_list: list) -> float:
     """Return sum of exponentials of numbers in a list"""
-    print("CALLED: int_list_to_exponential_sum(int_list: list) -> float:")
     return sum(math.exp(i) for i in int_list)
 
 @mcp.tool()
+@tool_cache.pure
 def fibonacci_numbers(n: int) -> list:
     """Return the first n Fibonacci Numbers"""
-    print("CALLED: fibonacci_numbers(n: int) -> list:")
     if n <= 0:
         return []
     fib_sequence = [0, 1]
@@ -173,10 +205,14 @@ def fibonacci_numbers(n: int) -> list:
         fib_sequence.append(fib_sequence[-1] + fib_sequence[-2])
     return fib_sequence[:n]
 
+@mcp.tool()
+def file_chars_to_int(path: str, cursor: str = "", count: int = 1000) -> dict:
+    """Return the ASCII values of the next count (at most 1000) characters of a text file, and next_cursor to pass for the following page (null at the end)"""
+    return file_chars_page(path, cursor, count)
+
 @mcp.tool()
 def open_freeform() -> str:
     """Open Freeform application and create a new document"""
-    print("CALLED: open_freeform() -> str:")
     try:
         # Just open Freeform
         subprocess.run(['open', '-a', 'Freeform'], check=True)
@@ -189,7 +225,6 @@ def open_freeform() -> str:
 @mcp.tool()
 def draw_rectangle(x: int, y: int, width: int, height: int) -> str:
     """Draw a rectangle in Freeform at specified coordinates"""
-    print("CALLED: draw_rectangle(x: int, y: int, width: int, height: int) -> str:")
     try:
         # Activate Freeform
         subprocess.run(['open', '-a', 'Freeform'], check=True)
@@ -203,7 +238,6 @@ def draw_rectangle(x: int, y: int, width: int, height: int) -> str:
 @mcp.tool()
 def add_text_in_freeform(x: int, y: int, text: str) -> str:
     """Add text to Freeform at specified coordinates"""
-    print("CALLED: add_text_in_freeform(x: int, y: int, text: str) -> str:")
     try:
         # Activate Freeform
         subprocess.run(['open', '-a', 'Freeform'], check=True)
@@ -220,15 +254,36 @@ def add_text_in_freeform(x: int, y: int, text: str) -> str:
 @mcp.resource("greeting://{name}")
 def get_greeting(name: str) -> str:
     """Get a personalized greeting"""
-    print("CALLED: get_greeting(name: str) -> str:")
     return f"Hello, {name}!"
 
 
+# Pages of the Fibonacci sequence, F(start) .. F(start + count - 1); "next" is the following page
+fibonacci_pager = FibonacciPager()
+
+@mcp.resource("fib://{start}/{count}")
+def get_fibonacci_page(start: int, count: int) -> str:
+    """Get a page of at most 1000 Fibonacci numbers"""
+    return json.dumps(fibonacci_pager.page(start, count))
+
+
+# Per-tool call counts and latency histograms from the tracer
+@mcp.resource("stats://tools")
+def get_tool_stats() -> str:
+    """Get per-tool call statistics"""
+    return json.dumps(tracer.summary())
+
+
+# Hits, misses, evictions and size of the pure-tool result cache
+@mcp.resource("stats://cache")
+def get_cache_stats() -> str:
+    """Get pure-tool cache statistics"""
+    return json.dumps(tool_cache.stats())
+
+
 # DEFINE AVAILABLE PROMPTS
 @mcp.prompt()
 def review_code(code: str) -> str:
     return f"Please review this code:\n\n{code}"
-    print("CALLED: review_code(code: str) -> str:")
 
 
 @mcp.prompt()
@@ -239,10 +294,17 @@ def debug_error(error: str) -> list[base.Message]:
         base.AssistantMessage("I'll help debug that. What have you tried so far?"),
     ]
 
+# TRACE TOOL CALLS
+# Wraps every tool defined above; trace records go to stderr or a file, never stdout
+tracer = tracer_from_env()
+tracer.instrument(mcp)
+
 if __name__ == "__main__":
     # Check if running with mcp dev command
-    print("STARTING")
+    print("STARTING", file=sys.stderr)  # stdout carries the JSON-RPC stream
     if len(sys.argv) > 1 and sys.argv[1] == "dev":
         mcp.run()  # Run without transport for dev server
+    elif len(sys.argv) > 1 and sys.argv[1] == "http":
+        mcp.run(transport="streamable-http")  # Serve over HTTP, port taken from FASTMCP_PORT
     else:
         mcp.run(transport="stdio")  # Run with stdio for direct execution
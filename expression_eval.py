@@ -0,0 +1,148 @@
+import ast
+import math
+from functools import lru_cache
+
+# Limits that keep a single expression from tying up the server
+MAX_EXPONENT = 10000
+MAX_FACTORIAL = 5000
+MAX_INT_BITS = 100000
+
+
+def _power(a, b):
+    if abs(b) > MAX_EXPONENT:
+        raise ValueError(f"Exponent {b} is larger than {MAX_EXPONENT}")
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and a.bit_length() * b > MAX_INT_BITS:
+        raise ValueError(f"Result of power would exceed {MAX_INT_BITS} bits")
+    return a ** b
+
+
+def _factorial(a):
+    if a > MAX_FACTORIAL:
+        raise ValueError(f"factorial({a}) is larger than factorial({MAX_FACTORIAL})")
+    return math.factorial(a)
+
+
+# Functions and constants an expression may use, matching the Calculator tools
+FUNCTIONS = {
+    "sqrt": lambda a: a ** 0.5,
+    "cbrt": lambda a: a ** (1 / 3),
+    "factorial": _factorial,
+    "log": math.log,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "exp": math.exp,
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+
+class _Restrict(ast.NodeTransformer):
+    """Reject anything but arithmetic on numbers, names and whitelisted calls
+
+    Every power is rewritten into a call to _power(), which enforces MAX_EXPONENT.
+    """
+
+    def __init__(self):
+        self.variables = set()
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _BINARY_OPERATORS):
+            raise ValueError(f"Unsupported operator in expression: {type(node.op).__name__}")
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(
+                ast.Call(func=ast.Name(id="_power", ctx=ast.Load()), args=[left, right], keywords=[]),
+                node,
+            )
+        node.left, node.right = left, right
+        return node
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _UNARY_OPERATORS):
+            raise ValueError(f"Unsupported operator in expression: {type(node.op).__name__}")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant in expression: {node.value!r}")
+        return node
+
+    def visit_Name(self, node):
+        if node.id.startswith("_"):
+            raise ValueError(f"Unsupported name in expression: {node.id}")
+        if node.id in FUNCTIONS:
+            raise ValueError(f"{node.id} must be called, e.g. {node.id}(2)")
+        if node.id not in CONSTANTS:
+            self.variables.add(node.id)
+        return node
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise ValueError(f"Unsupported function in expression: {ast.unparse(node.func)}")
+        if node.keywords or len(node.args) != 1:
+            raise ValueError(f"{node.func.id}() takes exactly one argument")
+        node.args = [self.visit(node.args[0])]
+        return node
+
+
+class CompiledExpression:
+    """A checked expression compiled to bytecode, with the variables it needs"""
+
+    def __init__(self, expression, code, variables):
+        self.expression = expression
+        self.code = code
+        self.variables = frozenset(variables)
+
+    def __call__(self, variables=None):
+        variables = variables or {}
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ValueError(f"Missing value for variable(s): {', '.join(sorted(missing))}")
+        namespace = {"__builtins__": {}, "_power": _power}
+        for name in self.variables:
+            value = variables[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Variable {name} must be a number, got {value!r}")
+            namespace[name] = value
+        namespace.update(FUNCTIONS)
+        namespace.update(CONSTANTS)
+        result = eval(self.code, namespace)
+        # A root or fractional power of a negative number comes back complex
+        if isinstance(result, complex):
+            raise ValueError(f"{self.expression} has no real value")
+        return result
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression):
+    """Parse, check and compile an expression; cached by its text"""
+    try:
+        # ^ means power here (3^4), with the precedence and associativity of **
+        tree = ast.parse(expression.strip().replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}") from e
+    restrict = _Restrict()
+    tree = ast.fix_missing_locations(restrict.visit(tree))
+    return CompiledExpression(expression, compile(tree, "<expression>", "eval"), restrict.variables)
+
+
+def evaluate(expression, variables=None):
+    """Evaluate an expression once"""
+    return compile_expression(expression)(variables)
+
+
+def evaluate_many(expression, bindings):
+    """Evaluate one compiled expression for each dict of variable values"""
+    compiled = compile_expression(expression)
+    return [compiled(variables) for variables in bindings]
@@ -1,15 +1,37 @@
 import os
 import sys
+import json
+import time
+import stat
+import socket
+import argparse
+import tempfile
 import subprocess
 from pathlib import Path
 
-def launch_application():
+def runtime_dir():
+    """Private 0700 directory for the daemon's socket and log, in $XDG_RUNTIME_DIR if set, else the temp dir"""
+    base = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    path = os.path.join(base, f"mcp-agent-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    # Refuse a directory another user created (or a symlink planted) at the same name
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by you with mode 0700")
+    return path
+
+# Unix socket shared with agent_daemon.py; AGENT_SOCKET overrides it
+def daemon_socket_path():
+    return os.getenv("AGENT_SOCKET") or os.path.join(runtime_dir(), "agent.sock")
+
+def python_command():
+    """The interpreter and environment to run the app with, or None if the venv is missing"""
     # Get the current directory
     current_dir = Path(__file__).parent.absolute()
-    
+
     # Check if we're in a virtual environment
     in_venv = hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix)
-    
+
     if not in_venv:
         # Activate virtual environment
         if sys.platform == 'win32':
@@ -18,20 +40,100 @@ def launch_application():
         else:
             activate_script = current_dir / '.venv' / 'bin' / 'activate'
             python_path = current_dir / '.venv' / 'bin' / 'python'
-        
+
         if not activate_script.exists():
             print("Virtual environment not found. Please run setup_env.py first.")
-            return
-        
+            return None
+
         # Set up the environment variables
         env = os.environ.copy()
         env['PYTHONPATH'] = str(current_dir)
-        
+        return str(python_path), env
+    # Already in virtual environment
+    return sys.executable, None
+
+def launch_application():
+    command = python_command()
+    if command:
+        python, env = command
         # Launch the application
-        subprocess.run([str(python_path), 'talk2mcp-2.py'], env=env)
-    else:
-        # Already in virtual environment, just run the application
-        subprocess.run([sys.executable, 'talk2mcp-2.py'])
+        subprocess.run([python, 'talk2mcp-2.py'], env=env)
+
+def send_request(request, on_output=print):
+    """Send one request to the daemon, pass streamed output lines to on_output, return the last message"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(daemon_socket_path())
+        client.sendall((json.dumps(request) + "\n").encode())
+        for line in client.makefile("r", encoding="utf-8"):
+            message = json.loads(line)
+            if "output" in message:
+                on_output(message["output"])
+            else:
+                return message
+    raise ConnectionError("Agent daemon closed the connection without a result")
+
+def daemon_running():
+    try:
+        return send_request({"command": "ping"}).get("ready", False)
+    except (OSError, ValueError):
+        return False
+
+def start_daemon(timeout=60):
+    """Start agent_daemon.py in the background and wait until it accepts queries"""
+    command = python_command()
+    if not command:
+        return False
+    python, env = command
+    current_dir = Path(__file__).parent.absolute()
+    log_path = os.path.join(runtime_dir(), 'agent.log')
+    print(f"Starting agent daemon (log: {log_path})...")
+    # The daemon keeps its own copy of the log handle
+    with open(log_path, 'a') as log:
+        subprocess.Popen(
+            [python, 'agent_daemon.py', daemon_socket_path()],
+            cwd=current_dir, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if daemon_running():
+            return True
+        time.sleep(0.1)
+    print(f"Agent daemon did not start; see {log_path}")
+    return False
+
+def ask_daemon(query):
+    response = send_request({"query": query})
+    if "error" in response:
+        print(f"Error from agent daemon: {response['error']}")
+        return None
+    print(f"\nResult: {response['result']}")
+    return response['result']
+
+def launch_daemon_client(query=None):
+    """Send queries to the warm agent daemon, starting it first if it is not running"""
+    if not daemon_running() and not start_daemon():
+        return
+    if query:
+        ask_daemon(query)
+        return
+    while True:
+        query = input("\nEnter your query (or 'quit' to exit): ")
+        if query.lower() == 'quit':
+            break
+        ask_daemon(query)
 
 if __name__ == "__main__":
-    launch_application() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the MCP agent")
+    parser.add_argument("--daemon", action="store_true", help="send queries to a warm background agent")
+    parser.add_argument("--query", help="with --daemon, answer this one query and exit")
+    parser.add_argument("--stop-daemon", action="store_true", help="shut the background agent down")
+    args = parser.parse_args()
+
+    if args.stop_daemon:
+        if daemon_running():
+            send_request({"command": "stop"})
+            print("Agent daemon stopped")
+    elif args.daemon:
+        launch_daemon_client(args.query)
+    else:
+        launch_application()
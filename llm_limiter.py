@@ -0,0 +1,152 @@
+import asyncio
+import heapq
+import itertools
+import os
+import statistics
+import time
+from collections import deque
+
+# Queued requests are granted in priority order; interactive queries go before batch ones
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Seconds to hold all requests after a quota error that came without a retry-after hint
+DEFAULT_RETRY_AFTER = 5.0
+
+
+def estimate_tokens(prompt):
+    """Rough prompt token count, about four characters per token"""
+    return max(len(prompt) // 4, 1)
+
+
+class _Bucket:
+    """Token bucket holding up to `capacity`, refilled at `capacity` per `period` seconds"""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)"""
+        return max(min(amount, self.capacity) - self.level, 0) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Process-wide limit on LLM requests and estimated prompt tokens per minute
+
+    Callers await acquire() before each LLM call. Requests wait in a priority queue and are
+    granted strictly in (priority, arrival) order once both buckets have room, so a waiting
+    interactive query is served before any batch query queued earlier. retry_after() holds
+    every request until a quota error's retry-after hint has passed. A limit of None means
+    unlimited. `period` is the quota window in seconds; tests pass a short one.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, period=60.0):
+        self.request_bucket = _Bucket(requests_per_minute, period) if requests_per_minute else None
+        self.token_bucket = _Bucket(tokens_per_minute, period) if tokens_per_minute else None
+        self.paused_until = 0.0
+        self._queue = []
+        self._order = itertools.count()
+        self._timer = None
+        self.quota_errors = 0
+        self.waits = {name: deque(maxlen=1000) for name in PRIORITIES}
+        self.granted = {name: 0 for name in PRIORITIES}
+
+    async def acquire(self, tokens=1, priority="interactive"):
+        """Wait for a turn to send a prompt of about `tokens` tokens; returns the seconds waited"""
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (PRIORITIES[priority], next(self._order), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Give the slot back to the queue if we were granted and cancelled at the same time
+            if future.done() and not future.cancelled():
+                self._refund(tokens)
+            raise
+        waited = time.monotonic() - start
+        self.waits[priority].append(waited)
+        self.granted[priority] += 1
+        return waited
+
+    def retry_after(self, seconds=None):
+        """Hold every request for `seconds` after a quota error (DEFAULT_RETRY_AFTER without a hint)"""
+        self.quota_errors += 1
+        seconds = DEFAULT_RETRY_AFTER if seconds is None else seconds
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        # The server says we are over quota whatever our own count is, so refill from empty
+        for bucket in (self.request_bucket, self.token_bucket):
+            if bucket:
+                bucket.level = 0
+
+    def _refund(self, tokens):
+        if self.request_bucket:
+            self.request_bucket.level = min(self.request_bucket.capacity, self.request_bucket.level + 1)
+        if self.token_bucket:
+            self.token_bucket.level = min(self.token_bucket.capacity, self.token_bucket.level + tokens)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant queued requests from the front while there is room, then sleep until there will be"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        for bucket in (self.request_bucket, self.token_bucket):
+            if bucket:
+                bucket.refill(now)
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.cancelled():
+                heapq.heappop(self._queue)
+                continue
+            wait = self.paused_until - now
+            if self.request_bucket:
+                wait = max(wait, self.request_bucket.wait_time(1))
+            if self.token_bucket:
+                wait = max(wait, self.token_bucket.wait_time(tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            if self.request_bucket:
+                self.request_bucket.take(1)
+            if self.token_bucket:
+                self.token_bucket.take(tokens)
+            future.set_result(None)
+
+    def stats(self):
+        """Queue wait times per priority, queue length and quota errors seen"""
+        stats = {"queued": len(self._queue), "quota_errors": self.quota_errors}
+        for name, waits in self.waits.items():
+            ordered = sorted(waits)
+            stats[name] = {
+                "granted": self.granted[name],
+                "avg_wait_s": statistics.mean(ordered) if ordered else 0.0,
+                "p99_wait_s": ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)] if ordered else 0.0,
+                "max_wait_s": ordered[-1] if ordered else 0.0,
+            }
+        return stats
+
+
+_shared_limiter = None
+
+
+def shared_limiter():
+    """The limiter shared by every agent in this process, configured by LLM_RPM and LLM_TPM"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = RateLimiter(
+            requests_per_minute=float(os.getenv("LLM_RPM", "0")) or None,
+            tokens_per_minute=float(os.getenv("LLM_TPM", "0")) or None,
+        )
+    return _shared_limiter
@@ -0,0 +1,252 @@
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+# Default Gemini model used by the agents
+GEMINI_MODEL = "models/gemini-2.0-flash"
+
+# JSON schema keys Gemini function declarations accept
+_SCHEMA_KEYS = ("type", "description", "properties", "required", "items", "enum", "format", "nullable")
+
+
+class QuotaError(Exception):
+    """The model refused a request because a rate or token quota was exceeded"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _quota_error(error):
+    """A QuotaError for a Gemini 429/ResourceExhausted error, with its retry-after hint if it has one"""
+    message = str(error)
+    if type(error).__name__ != "ResourceExhausted" and "429" not in message:
+        return None
+    # Hints look like "retry_delay { seconds: 23 }" or "Please retry in 23.5s"
+    hint = re.search(r"retry_delay\s*\{\s*seconds:\s*([0-9.]+)|retry in ([0-9.]+)\s*s", message)
+    return QuotaError(message, retry_after=float(hint.group(1) or hint.group(2)) if hint else None)
+
+
+@dataclass
+class FunctionCall:
+    """A structured tool call returned by a model"""
+    name: str
+    args: dict
+
+
+@dataclass
+class ModelResponse:
+    """Text and structured function calls returned by a model
+
+    Agents read `response.text` for the FUNCTION_CALL:/FINAL_ANSWER: text protocol and
+    `response.function_calls` when the model answered with native function calls.
+    """
+    text: str
+    function_calls: list = field(default_factory=list)
+
+
+def _free_form(schema):
+    """Whether a cleaned schema is an object, or list of objects, without declared properties"""
+    if schema.get("type") == "array":
+        return _free_form(schema.get("items", {}))
+    return schema.get("type") == "object" and not schema.get("properties")
+
+
+def _json_string(schema):
+    """A string parameter standing in for a free-form object parameter"""
+    if schema.get("type") == "array":
+        encoded = 'A JSON-encoded list of objects, e.g. [{"x": 1}]'
+    else:
+        encoded = 'A JSON-encoded object, e.g. {"x": 1}'
+    description = f"{schema['description']}. " if schema.get("description") else ""
+    return {"type": "string", "description": description + encoded}
+
+
+def _clean_schema(schema):
+    """Reduce a JSON schema from an MCP tool to the subset Gemini accepts"""
+    if "anyOf" in schema:
+        # Optional parameters (x: dict | None) become anyOf [..., null]; keep the non-null option
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        schema = {**{k: v for k, v in schema.items() if k != "anyOf"}, **(options[0] if options else {})}
+    cleaned = {key: value for key, value in schema.items() if key in _SCHEMA_KEYS}
+    if "properties" in cleaned:
+        properties = {name: _clean_schema(prop) for name, prop in cleaned["properties"].items()}
+        # Gemini cannot describe free-form objects (dict parameters), so those are declared as
+        # JSON strings; the MCP server parses a JSON string argument for a non-str parameter
+        cleaned["properties"] = {
+            name: _json_string(prop) if _free_form(prop) else prop for name, prop in properties.items()
+        }
+    if cleaned.get("type") == "array":
+        # Untyped lists (l: list) have no item type, which Gemini requires; the list tools here are numeric
+        items = _clean_schema(cleaned.get("items") or {})
+        cleaned["items"] = items if "type" in items else {"type": "number"}
+    return cleaned
+
+
+def function_declarations(tools):
+    """Describe MCP tools as native function declarations"""
+    declarations = []
+    for tool in tools:
+        declaration = {"name": tool.name, "description": tool.description or tool.name}
+        parameters = _clean_schema(tool.inputSchema)
+        if parameters.get("properties"):
+            declaration["parameters"] = parameters
+        declarations.append(declaration)
+    return declarations
+
+
+class GeminiModel:
+    """Google Gemini behind the generate_content() interface used by the agents"""
+
+    def __init__(self, model_name=GEMINI_MODEL, api_key=None):
+        # Imported here so the agents can be used offline without the Gemini SDK
+        import google.generativeai as genai
+
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in .env file")
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, prompt, tools=None):
+        """Generate a response, offering `tools` (function declarations) for native calls"""
+        try:
+            if tools:
+                response = self._model.generate_content(prompt, tools=[{"function_declarations": tools}])
+            else:
+                response = self._model.generate_content(prompt)
+        except Exception as e:
+            raise _quota_error(e) or e
+        # response.text raises when the reply contains function call parts, so read the parts
+        texts, function_calls = [], []
+        for part in response.candidates[0].content.parts:
+            if part.function_call.name:
+                args = type(part.function_call).to_dict(part.function_call).get("args", {})
+                function_calls.append(FunctionCall(name=part.function_call.name, args=args))
+            elif part.text:
+                texts.append(part.text)
+        return ModelResponse(text="".join(texts), function_calls=function_calls)
+
+    def stream_content(self, prompt, tools=None):
+        """Yield the text of the reply chunk by chunk as Gemini produces it"""
+        try:
+            for chunk in self._model.generate_content(prompt, stream=True):
+                for part in chunk.candidates[0].content.parts:
+                    if part.text:
+                        yield part.text
+        except Exception as e:
+            raise _quota_error(e) or e
+
+
+class ScriptedModel:
+    """Local model that replays recorded FUNCTION_CALL/FINAL_ANSWER responses in order
+
+    A response is either the reply text, a recorded native function call or a quota error
+    ({"quota_error": {"retry_after": seconds}}), which is raised as a QuotaError. Every prompt
+    it receives is kept in `prompts`, and the function declarations offered with it in
+    `declarations`. `latency` seconds stand in for the time to the first
+    token and `chunk_latency` for each further chunk of `chunk_size` characters, so
+    streamed and non-streamed replies take the same total time.
+    """
+
+    def __init__(self, responses, latency=0.0, chunk_size=8, chunk_latency=0.0):
+        self.responses = list(responses)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.prompts = []
+        self.declarations = []
+
+    @classmethod
+    def from_file(cls, path, latency=0.0):
+        """Load responses from a JSON list, as written by RecordingModel"""
+        with open(path) as f:
+            return cls(json.load(f), latency=latency)
+
+    def _next_response(self, prompt, tools):
+        if len(self.prompts) >= len(self.responses):
+            raise RuntimeError(f"Scripted model ran out of responses after {len(self.responses)} calls")
+        self.prompts.append(prompt)
+        self.declarations.append(tools)
+        recorded = self.responses[len(self.prompts) - 1]
+        if isinstance(recorded, dict) and "quota_error" in recorded:
+            raise QuotaError("429 Resource has been exhausted (scripted)", **recorded["quota_error"])
+        return recorded
+
+    def _chunks(self, text):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def generate_content(self, prompt, tools=None):
+        recorded = self._next_response(prompt, tools)
+        # Recorded native calls look like {"function_call": {"name": ..., "args": {...}}}
+        if isinstance(recorded, dict):
+            time.sleep(self.latency)
+            return ModelResponse(text="", function_calls=[FunctionCall(**recorded["function_call"])])
+        time.sleep(self.latency + self.chunk_latency * max(len(self._chunks(recorded)) - 1, 0))
+        return ModelResponse(text=recorded)
+
+    def stream_content(self, prompt, tools=None):
+        recorded = self._next_response(prompt, tools)
+        if isinstance(recorded, dict):
+            raise ValueError("Recorded native function calls cannot be streamed")
+        time.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(recorded)):
+            if i:
+                time.sleep(self.chunk_latency)
+            yield chunk
+
+
+class RecordingModel:
+    """Wrap another model and save every response to a JSON file for later replay"""
+
+    def __init__(self, model, path):
+        self.model = model
+        self.path = path
+        self.responses = []
+
+    def generate_content(self, prompt, tools=None):
+        response = self.model.generate_content(prompt, tools=tools)
+        if response.function_calls:
+            call = response.function_calls[0]
+            self.responses.append({"function_call": {"name": call.name, "args": call.args}})
+        else:
+            self.responses.append(response.text)
+        self._save()
+        return response
+
+    def stream_content(self, prompt, tools=None):
+        chunks = []
+        try:
+            for chunk in self.model.stream_content(prompt, tools=tools):
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            # The agent may stop reading once it has a complete FUNCTION_CALL line
+            self.responses.append("".join(chunks))
+            self._save()
+
+    def _save(self):
+        with open(self.path, "w") as f:
+            json.dump(self.responses, f, indent=2)
+
+
+def load_model():
+    """Create the model selected by the environment
+
+    LLM_MODEL=scripted:<file.json> replays a recording (LLM_LATENCY sets seconds per call);
+    anything else uses Gemini. LLM_RECORD=<file.json> records the responses of the chosen model.
+    """
+    model_spec = os.getenv("LLM_MODEL", "gemini")
+    if model_spec.startswith("scripted:"):
+        model = ScriptedModel.from_file(
+            model_spec.split(":", 1)[1],
+            latency=float(os.getenv("LLM_LATENCY", "0")),
+        )
+    else:
+        model = GeminiModel()
+    record_path = os.getenv("LLM_RECORD")
+    if record_path:
+        model = RecordingModel(model, record_path)
+    return model
@@ -1,3 +1,4 @@
+import sys
 from mcp.server.fastmcp import FastMCP
 from mcp.types import TextContent
 
@@ -17,5 +18,8 @@ async def reverse_string(text: str) -> dict:
     }
 
 if __name__ == "__main__":
-    print("Starting MCP String Reverser server...")
-    mcp.run() 
\ No newline at end of file
+    print("Starting MCP String Reverser server...", file=sys.stderr)  # stdout carries the JSON-RPC stream
+    if len(sys.argv) > 1 and sys.argv[1] == "http":
+        mcp.run(transport="streamable-http")  # Serve over HTTP, port taken from FASTMCP_PORT
+    else:
+        mcp.run() 
\ No newline at end of file
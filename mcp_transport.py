@@ -0,0 +1,137 @@
+import importlib.util
+import logging
+import os
+import socket
+import subprocess
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import anyio
+from mcp import StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.memory import create_client_server_memory_streams
+
+# Transports understood by open_transport()
+TRANSPORTS = ("stdio", "memory", "http")
+
+# Scripts already imported into this process, keyed by path
+_loaded_modules = {}
+
+
+def _script_path(script):
+    """Resolve a script path relative to this directory"""
+    path = Path(script)
+    if not path.is_absolute():
+        path = Path(__file__).parent / path
+    return path.resolve()
+
+
+def load_module(script):
+    """Import a script from this directory as a module, once per process"""
+    path = _script_path(script)
+    if path not in _loaded_modules:
+        # Script names like example2-3.py are not valid module names
+        module_name = path.stem.replace("-", "_")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_modules[path] = module
+    return _loaded_modules[path]
+
+
+def load_server(script):
+    """Import an MCP server script and return its FastMCP instance"""
+    return load_module(script).mcp
+
+
+@asynccontextmanager
+async def memory_client(server):
+    """Host a FastMCP server in this event loop and yield (read, write) streams connected to it"""
+    lowlevel_server = server._mcp_server
+    # The server logs every request at INFO; in-process that formatting is a large share of each call
+    logging.getLogger("mcp.server.lowlevel.server").setLevel(logging.WARNING)
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        server_read, server_write = server_streams
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: lowlevel_server.run(
+                    server_read,
+                    server_write,
+                    lowlevel_server.create_initialization_options(),
+                )
+            )
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
+
+
+def _free_port():
+    """A local port nothing is listening on, chosen by the OS"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _port_open(port):
+    """Check whether something is accepting connections on a local port"""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+@asynccontextmanager
+async def http_client(script, port=None, startup_timeout=15):
+    """Start a server script with its streamable HTTP transport and yield (read, write) streams to it
+
+    The port defaults to MCP_HTTP_PORT, else a free one picked by the OS.
+    """
+    port = port or int(os.getenv("MCP_HTTP_PORT", "0")) or _free_port()
+    if _port_open(port):
+        # Otherwise we would end up talking to whatever already listens there
+        raise RuntimeError(f"Port {port} is already in use; set MCP_HTTP_PORT to a free port")
+    env = os.environ.copy()
+    env["FASTMCP_PORT"] = str(port)
+    process = subprocess.Popen(
+        ["python3", script, "http"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Wait for uvicorn to start listening
+        with anyio.fail_after(startup_timeout):
+            while not _port_open(port):
+                if process.poll() is not None:
+                    raise RuntimeError(f"{script} exited before serving HTTP on port {port}")
+                await anyio.sleep(0.1)
+        if process.poll() is not None:
+            raise RuntimeError(f"{script} exited before serving HTTP on port {port}")
+        async with streamablehttp_client(f"http://127.0.0.1:{port}/mcp/") as (read, write, _):
+            yield read, write
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def open_transport(script, transport=None):
+    """Open (read, write) streams to an MCP server script over the chosen transport
+
+    The transport defaults to the MCP_TRANSPORT environment variable, then stdio.
+    Every transport yields streams that can be handed straight to ClientSession.
+    """
+    transport = transport or os.getenv("MCP_TRANSPORT", "stdio")
+    if transport == "stdio":
+        server_params = StdioServerParameters(
+            command="python3",
+            args=[script]
+        )
+        return stdio_client(server_params)
+    if transport == "memory":
+        return memory_client(load_server(script))
+    if transport == "http":
+        return http_client(script)
+    raise ValueError(f"Unknown MCP transport: {transport} (expected one of {', '.join(TRANSPORTS)})")
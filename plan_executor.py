@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+
+class PlanError(Exception):
+    """Raised when a plan cannot be parsed or one of its steps fails"""
+
+    def __init__(self, message, step_id=None):
+        super().__init__(message)
+        self.step_id = step_id
+
+
+def _references(value, step_ids):
+    """Ids of the steps whose output an argument value refers to as "$<id>" """
+    if isinstance(value, str):
+        if value.startswith("$") and value[1:] in step_ids:
+            yield value[1:]
+    elif isinstance(value, list):
+        for item in value:
+            yield from _references(item, step_ids)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _references(item, step_ids)
+
+
+def _substitute(value, outputs):
+    """Replace "$<id>" references with the outputs of those steps"""
+    if isinstance(value, str) and value.startswith("$") and value[1:] in outputs:
+        return outputs[value[1:]]
+    if isinstance(value, list):
+        return [_substitute(item, outputs) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, outputs) for key, item in value.items()}
+    return value
+
+
+def parse_plan(text):
+    """Parse a `PLAN: {...}` reply and return it with its steps in dependency order
+
+    A plan looks like {"steps": [{"id": ..., "tool": ..., "args": {...}}, ...], "answer": "$<id>"};
+    an argument value "$<id>" stands for the output of step <id>.
+    """
+    try:
+        _, body = text.split(":", 1)
+        plan = json.loads(body)
+        steps = plan["steps"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise PlanError(f"Invalid plan: {e}") from e
+    if not isinstance(steps, list) or not steps:
+        raise PlanError("Invalid plan: no steps")
+
+    by_id = {}
+    for step in steps:
+        if not isinstance(step, dict) or "id" not in step or "tool" not in step:
+            raise PlanError(f"Invalid plan step: {step}")
+        step["id"] = str(step["id"])
+        step.setdefault("args", {})
+        if step["id"] in by_id:
+            raise PlanError(f"Duplicate plan step id: {step['id']}", step["id"])
+        by_id[step["id"]] = step
+    for step in steps:
+        step["depends_on"] = sorted(set(_references(step["args"], by_id)))
+
+    # Topological order; anything left over is part of a cycle
+    ordered, done = [], set()
+    while len(ordered) < len(steps):
+        ready = [s for s in steps if s["id"] not in done and all(d in done for d in s["depends_on"])]
+        if not ready:
+            raise PlanError("Invalid plan: steps depend on each other in a cycle")
+        ordered.extend(ready)
+        done.update(s["id"] for s in ready)
+    plan["steps"] = ordered
+    plan.setdefault("answer", f"${ordered[-1]['id']}")
+    return plan
+
+
+async def execute_plan(plan, call_tool, outputs=None):
+    """Run every step of a parsed plan and return the value of its answer
+
+    Each step starts as soon as the steps it depends on have finished, so independent
+    steps run concurrently. `call_tool(name, arguments)` is awaited for every step and
+    its return value becomes the step's output. Outputs are collected in `outputs`, so
+    after a PlanError the caller still sees which steps completed.
+    """
+    outputs = {} if outputs is None else outputs
+    tasks = {}
+
+    async def run_step(step):
+        for dependency in step["depends_on"]:
+            await tasks[dependency]
+        arguments = _substitute(step["args"], outputs)
+        try:
+            outputs[step["id"]] = await call_tool(step["tool"], arguments)
+        except Exception as e:
+            raise PlanError(f"Step {step['id']} ({step['tool']}) failed: {e}", step["id"]) from e
+
+    for step in plan["steps"]:
+        tasks[step["id"]] = asyncio.ensure_future(run_step(step))
+    try:
+        await asyncio.gather(*tasks.values())
+    except PlanError:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return _substitute(plan["answer"], outputs)
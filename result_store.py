@@ -0,0 +1,55 @@
+import json
+import os
+
+# Results longer than this many characters stay in the store and only a preview reaches the prompt
+PREVIEW_CHARS = int(os.getenv("RESULT_PREVIEW_CHARS", "200"))
+
+
+def _parse(text):
+    """Decode a JSON text item, keeping plain text as is"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def result_value(result):
+    """Turn a CallToolResult into a Python value
+
+    FastMCP returns a list result as one text item per element, so several items become a list.
+    """
+    values = [_parse(content.text) for content in result.content if hasattr(content, 'text')]
+    return values[0] if len(values) == 1 else values
+
+
+class ResultStore:
+    """Client-side store that keeps large tool results out of the prompt
+
+    Large values are saved under short handles ($r1, $r2, ...) and the prompt shows the handle
+    with a truncated preview. A later FUNCTION_CALL can pass the handle as a parameter and
+    the agent substitutes the stored value without it passing through the model.
+    """
+
+    def __init__(self, preview_chars=PREVIEW_CHARS):
+        self.preview_chars = preview_chars
+        self.values = {}
+
+    def __contains__(self, handle):
+        return isinstance(handle, str) and handle in self.values
+
+    def get(self, handle):
+        return self.values[handle]
+
+    def put(self, value):
+        """Keep a value under a new handle and return the handle"""
+        handle = f"$r{len(self.values) + 1}"
+        self.values[handle] = value
+        return handle
+
+    def describe(self, value):
+        """Text for the prompt: the value itself, or a handle and preview when it is large"""
+        text = value if isinstance(value, str) else json.dumps(value)
+        if len(text) <= self.preview_chars:
+            return text
+        handle = self.put(value)
+        return f"{handle} (stored, {len(text)} chars, pass {handle} as a parameter to use it): {text[:self.preview_chars]}..."
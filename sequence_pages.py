@@ -0,0 +1,112 @@
+import base64
+import json
+import math
+import os
+import sys
+from collections import OrderedDict
+from itertools import islice
+
+# Largest page a client may ask for, which bounds the memory one request can take
+MAX_PAGE_SIZE = 1000
+
+# Paused generators kept for clients that are paging through a sequence
+MAX_SAVED_GENERATORS = 32
+
+# F(n) has about n * log10(phi) digits
+_LOG10_PHI = math.log10((1 + math.sqrt(5)) / 2)
+
+
+def fibonacci_pair(n):
+    """(F(n), F(n+1)) by fast doubling, in O(log n) steps without the numbers before n"""
+    if n == 0:
+        return 0, 1
+    a, b = fibonacci_pair(n // 2)
+    c = a * (2 * b - a)
+    d = a * a + b * b
+    return (d, c + d) if n % 2 else (c, d)
+
+
+def fibonacci_from(start):
+    """Generate F(start), F(start+1), ... holding only the last two values"""
+    a, b = fibonacci_pair(start)
+    while True:
+        yield a
+        a, b = b, a + b
+
+
+class FibonacciPager:
+    """Serves pages of the Fibonacci sequence from paused generators
+
+    After a page ending at index i, its generator is kept under i, so a request for
+    the page starting at i resumes it instead of recomputing from the start. A page
+    that starts anywhere else gets a fresh generator, positioned by fast doubling.
+    """
+
+    def __init__(self, max_saved=MAX_SAVED_GENERATORS):
+        self.max_saved = max_saved
+        self.generators = OrderedDict()  # next index -> paused generator
+        self.resumed = 0
+        self.started = 0
+
+    def page(self, start, count):
+        if start < 0 or not 0 < count <= MAX_PAGE_SIZE:
+            raise ValueError(f"start must be >= 0 and count between 1 and {MAX_PAGE_SIZE}")
+        digit_limit = sys.get_int_max_str_digits()
+        if digit_limit and (start + count) * _LOG10_PHI > digit_limit:
+            raise ValueError(f"F({start + count - 1}) has more than the {digit_limit} digits Python will print")
+        generator = self.generators.pop(start, None)
+        if generator is None:
+            self.started += 1
+            generator = fibonacci_from(start)
+        else:
+            self.resumed += 1
+        values = list(islice(generator, count))
+        self.generators[start + count] = generator
+        while len(self.generators) > self.max_saved:
+            self.generators.popitem(last=False)
+        return {
+            "start": start,
+            "count": count,
+            "values": values,
+            "next": f"fib://{start + count}/{count}",
+        }
+
+
+def _encode_cursor(position, mtime_ns):
+    return base64.urlsafe_b64encode(json.dumps([position, mtime_ns]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        position, mtime_ns = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(position), int(mtime_ns)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def file_chars_page(path, cursor="", count=MAX_PAGE_SIZE):
+    """ASCII values of the next `count` characters of a text file, and the cursor after them
+
+    The cursor holds the file position, so each page reads only its own characters; it
+    is rejected once the file has changed since the first page. next_cursor is None at
+    the end of the file.
+    """
+    if not 0 < count <= MAX_PAGE_SIZE:
+        raise ValueError(f"count must be between 1 and {MAX_PAGE_SIZE}")
+    mtime_ns = os.stat(path).st_mtime_ns
+    position = 0
+    if cursor:
+        position, cursor_mtime_ns = _decode_cursor(cursor)
+        if cursor_mtime_ns != mtime_ns:
+            raise ValueError(f"{path} changed since this cursor was issued; start again without one")
+    # newline="" keeps \r\n as 13, 10, the same codes file_codes reads from the raw bytes
+    with open(path, encoding="utf-8", newline="") as f:
+        f.seek(position)
+        text = f.read(count)
+        next_position = f.tell()
+        at_end = not f.read(1)
+    values = [ord(char) for char in text]
+    return {
+        "values": values,
+        "next_cursor": None if at_end else _encode_cursor(next_position, mtime_ns),
+    }
@@ -1,33 +1,65 @@
 import os
+import json
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters, types
-from mcp.client.stdio import stdio_client
+from mcp import ClientSession, types
+from mcp_transport import open_transport
+from llm_models import ModelResponse, QuotaError, function_declarations, load_model
+from llm_limiter import DEFAULT_RETRY_AFTER, estimate_tokens, shared_limiter
+from result_store import ResultStore, result_value
+from plan_executor import PlanError, execute_plan, parse_plan
+from tool_index import ToolIndex
 import asyncio
-import google.generativeai as genai
+import threading
+import time
 from concurrent.futures import TimeoutError
 from functools import partial
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Access your API key and initialize Gemini client correctly
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
-
-# Configure the Gemini API
-genai.configure(api_key=api_key)
-
-# Initialize the model
-model = genai.GenerativeModel('models/gemini-2.0-flash')
+# The model is created in main() (Gemini unless LLM_MODEL selects a scripted one)
+model = None
 
 max_iterations = 3
 last_response = None
 iteration = 0
 iteration_response = []
+result_store = ResultStore()
+
+# FUNCTION_CALLING=native passes the tool schemas to the model as function declarations;
+# the FUNCTION_CALL: text protocol stays available as a fallback
+function_calling = os.getenv("FUNCTION_CALLING", "text")
+tool_declarations = None
+
+# AGENT_MODE=plan asks the model for the whole multi-step plan in one reply and runs it locally
+agent_mode = os.getenv("AGENT_MODE", "iterative")
+
+# LLM_STREAM=1 streams text-protocol replies and calls the tool as soon as the FUNCTION_CALL line is complete
+streaming = os.getenv("LLM_STREAM") == "1"
+
+# FIRST_RESULT_IS_ANSWER=1 restores the old shortcut of returning the first tool result (and any
+# strings_to_chars_to_int result) as the final answer; by default results go back to the model,
+# large ones as a $rN handle with a preview
+first_result_is_answer = os.getenv("FIRST_RESULT_IS_ANSWER") == "1"
+
+# TOOL_TOP_K=<k> lists only the k tools most relevant to each query in the prompt, and declares only
+# those for native function calling (0 offers every tool)
+tool_top_k = int(os.getenv("TOOL_TOP_K", "0"))
+tool_index = None
+
+# Every LLM call waits its turn in the process-wide limiter (LLM_RPM/LLM_TPM) at the priority of
+# its query; batch callers pass priority="batch" so interactive queries go first. Quota errors are retried
+limiter = shared_limiter()
+max_quota_retries = 3
 
-async def generate_with_timeout(prompt, timeout=10):
-    """Generate content with a timeout"""
+# Counters across all math queries, see agent_stats()
+query_stats = {
+    "queries": 0, "solved": 0, "solved_iterations": 0, "llm_responses": 0, "parse_failures": 0,
+    "first_tool_calls": 0, "time_to_first_tool_call_s": 0.0, "tool_set_widened": 0,
+}
+
+async def generate_with_timeout(prompt, timeout=10, tools=None):
+    """Generate content with a timeout, offering `tools` (function declarations) for native calls"""
     print("Starting LLM generation...")
     try:
         # Convert the synchronous generate_content call to run in a thread
@@ -35,7 +67,7 @@ async def generate_with_timeout(prompt, timeout=10):
         response = await asyncio.wait_for(
             loop.run_in_executor(
                 None, 
-                lambda: model.generate_content(prompt)          ),
+                lambda: model.generate_content(prompt, tools=tools)          ),
             timeout=timeout
         )
         print("LLM generation completed")
@@ -47,16 +79,154 @@ async def generate_with_timeout(prompt, timeout=10):
         print(f"Error in LLM generation: {e}")
         raise
 
+async def limited_generate(generate, prompt, tools=None, priority="interactive"):
+    """Call generate(prompt, tools=tools) when the rate limiter allows, waiting out quota errors"""
+    # Function declarations are sent with the prompt and count towards the token budget too
+    tokens = estimate_tokens(prompt + json.dumps(tools) if tools else prompt)
+    for attempt in range(max_quota_retries + 1):
+        waited = await limiter.acquire(tokens, priority)
+        if waited > 0.01:
+            print(f"Waited {waited:.2f}s for the LLM rate limiter")
+        try:
+            return await generate(prompt, tools=tools)
+        except QuotaError as e:
+            if attempt == max_quota_retries:
+                raise
+            delay = DEFAULT_RETRY_AFTER if e.retry_after is None else e.retry_after
+            print(f"LLM quota exceeded, retrying in {delay}s")
+            limiter.retry_after(delay)
+
+def action_line(text):
+    """The first line of a reply when it is a FUNCTION_CALL:/FINAL_ANSWER: line, else the whole reply"""
+    first_line = text.strip().split("\n", 1)[0].strip()
+    return first_line if first_line.startswith(("FUNCTION_CALL:", "FINAL_ANSWER:")) else text.strip()
+
+async def stream_with_timeout(prompt, timeout=10, tools=None):
+    """Stream a reply and return as soon as its first line is a complete FUNCTION_CALL/FINAL_ANSWER
+
+    The rest of the reply is not waited for. A reply whose first line is anything else is read
+    to the end, so parsing sees the same text as with generate_with_timeout().
+    """
+    print("Starting LLM stream...")
+    loop = asyncio.get_event_loop()
+    chunks = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        # Runs in a worker thread; hands every chunk to the event loop, then None (or the error)
+        stream = model.stream_content(prompt, tools=tools)
+        try:
+            for chunk in stream:
+                loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                if stop.is_set():
+                    break
+            loop.call_soon_threadsafe(chunks.put_nowait, None)
+        except Exception as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, e)
+        finally:
+            stream.close()
+
+    async def consume():
+        text = ""
+        while True:
+            chunk = await chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if chunk is None:
+                return text
+            text += chunk
+            if "\n" in text.lstrip() and action_line(text) != text.strip():
+                print("LLM stream: complete line received, not waiting for the rest")
+                return action_line(text)
+
+    loop.run_in_executor(None, produce)
+    try:
+        text = await asyncio.wait_for(consume(), timeout=timeout)
+    except TimeoutError:
+        print("LLM stream timed out!")
+        raise
+    finally:
+        stop.set()
+    print("LLM stream completed")
+    return ModelResponse(text=text)
+
 def reset_state():
     """Reset all global variables to their initial state"""
-    global last_response, iteration, iteration_response
+    global last_response, iteration, iteration_response, result_store
     last_response = None
     iteration = 0
     iteration_response = []
+    result_store = ResultStore()
+
+def query_system_prompt(query, widen=1):
+    """The system prompt for a query: every tool, or the top tool_top_k * widen tools from tool_index"""
+    if tool_index is None or not tool_top_k:
+        return system_prompt
+    return build_system_prompt(tool_index.search(query, tool_top_k * widen))
+
+def query_declarations(query, widen=1):
+    """Native function declarations for the same tools query_system_prompt() lists, or None"""
+    if tool_declarations is None or tool_index is None or not tool_top_k:
+        return tool_declarations
+    names = {tool.name for tool in tool_index.search(query, tool_top_k * widen)}
+    return [declaration for declaration in tool_declarations if declaration["name"] in names]
 
-async def handle_math_query(session, query):
-    """Handle mathematical queries"""
+def agent_stats():
+    """Parse-failure rate, average iterations per solved query and LLM queue wait times"""
+    return {
+        **query_stats,
+        "parse_failure_rate": query_stats["parse_failures"] / max(query_stats["llm_responses"], 1),
+        "avg_iterations_per_solved": query_stats["solved_iterations"] / max(query_stats["solved"], 1),
+        "avg_time_to_first_tool_call_s": (
+            query_stats["time_to_first_tool_call_s"] / max(query_stats["first_tool_calls"], 1)
+        ),
+        "rate_limiter": limiter.stats(),
+    }
+
+def build_arguments(tool, params):
+    """Map FUNCTION_CALL parameters (a positional list) or native call args (a dict) onto the tool's schema"""
+    properties = tool.inputSchema.get('properties', {})
+    if isinstance(params, dict):
+        named_params = [(name, value) for name, value in params.items() if name in properties]
+    else:
+        named_params = list(zip(properties.keys(), params))
+
+    arguments = {}
+    for param_name, param in named_params:
+        # Convert parameter to appropriate type
+        param_type = properties[param_name].get('type', 'string')
+        if param in result_store:
+            # A $rN handle: use the stored result without sending it through the model
+            param = result_store.get(param)
+        elif param_type == 'integer':
+            param = int(param)
+        elif param_type == 'number':
+            param = float(param)
+        if param_type == 'array' and not isinstance(param, (list, str)):
+            # A one-element list result comes back from the server as a scalar
+            param = [param]
+        arguments[param_name] = param
+    return arguments
+
+async def handle_math_query(session, query, priority="interactive"):
+    """Handle mathematical queries; `priority` is the rate limiter priority of its LLM calls"""
+    query_stats["queries"] += 1
+    responses_before = query_stats["llm_responses"]
+    solve = solve_plan_query if agent_mode == "plan" else solve_math_query
+    answer = await solve(session, query, priority)
+    if not answer.startswith("FINAL_ANSWER: [Error"):
+        query_stats["solved"] += 1
+        query_stats["solved_iterations"] += query_stats["llm_responses"] - responses_before
+    return answer
+
+async def solve_math_query(session, query, priority="interactive"):
+    """Run the LLM/tool loop for one mathematical query"""
     global iteration, last_response, iteration_response
+    query_start = time.perf_counter()
+    first_tool_call = True
+    # Native function calls arrive whole, so only the text protocol is streamed
+    generate = stream_with_timeout if streaming and tool_declarations is None else generate_with_timeout
+    widen = 1
     
     while iteration < max_iterations:
         print(f"\n--- Iteration {iteration + 1} ---")
@@ -64,7 +234,7 @@ async def handle_math_query(session, query):
             current_query = query
         else:
             # If we've already gotten a result, format it as a final answer
-            if "TextContent" in str(last_response):
+            if first_result_is_answer and "TextContent" in str(last_response):
                 result_values = []
                 for content in last_response.content:
                     if hasattr(content, 'text'):
@@ -76,55 +246,75 @@ async def handle_math_query(session, query):
 
         # Get model's response with timeout
         print("Preparing to generate LLM response...")
-        prompt = f"{system_prompt}\n\nQuery: {current_query}"
+        prompt = f"{query_system_prompt(query, widen)}\n\nQuery: {current_query}"
         try:
-            response = await generate_with_timeout(prompt)
-            response_text = response.text.strip()
-            print(f"LLM Response: {response_text}")
+            response = await limited_generate(generate, prompt, query_declarations(query, widen), priority)
+            # Anything the model adds after a FUNCTION_CALL/FINAL_ANSWER line is ignored
+            response_text = action_line(response.text)
+            print(f"LLM Response: {response_text or response.function_calls}")
+            query_stats["llm_responses"] += 1
             
             if response_text.startswith("FINAL_ANSWER:"):
                 print(f"Final answer found: {response_text}")
                 return response_text
             
-            if response_text.startswith("FUNCTION_CALL:"):
+            func_name = None
+            if response.function_calls:
+                # Native function call: arguments arrive keyed by parameter name
+                func_name, params = response.function_calls[0].name, response.function_calls[0].args
+            elif response_text.startswith("FUNCTION_CALL:"):
                 _, function_info = response_text.split(":", 1)
                 parts = [p.strip() for p in function_info.split("|")]
                 func_name, params = parts[0], parts[1:]
-                
+            else:
+                print(f"Could not parse LLM response: {response_text}")
+                query_stats["parse_failures"] += 1
+                iteration_response.append(
+                    "Your last reply was not a single FUNCTION_CALL: or FINAL_ANSWER: line."
+                )
+                last_response = response_text
+
+            if func_name is not None:
                 try:
-                    # Find the matching tool
+                    # Find the matching tool and prepare arguments
                     tool = next((t for t in tools if t.name == func_name), None)
                     if not tool:
+                        # The model may be guessing because the tool it needs was filtered out
+                        widen *= 2
+                        query_stats["tool_set_widened"] += 1
                         raise ValueError(f"Unknown tool: {func_name}")
+                    arguments = build_arguments(tool, params)
+                except ValueError as e:
+                    print(f"Could not parse function call: {e}")
+                    query_stats["parse_failures"] += 1
+                    func_name = None
+                    iteration_response.append(f"Error: {str(e)}")
+                    last_response = f"Error: {str(e)}"
 
-                    # Prepare arguments
-                    arguments = {}
-                    if 'properties' in tool.inputSchema:
-                        param_names = list(tool.inputSchema['properties'].keys())
-                        for i, param in enumerate(params):
-                            if i < len(param_names):
-                                # Convert parameter to appropriate type
-                                param_type = tool.inputSchema['properties'][param_names[i]].get('type', 'string')
-                                if param_type == 'integer':
-                                    param = int(param)
-                                elif param_type == 'number':
-                                    param = float(param)
-                                arguments[param_names[i]] = param
-
+            if func_name is not None:
+                try:
+                    if first_tool_call:
+                        first_tool_call = False
+                        query_stats["first_tool_calls"] += 1
+                        query_stats["time_to_first_tool_call_s"] += time.perf_counter() - query_start
                     # Call the tool
                     result = await session.call_tool(func_name, arguments=arguments)
-                    result_text = str(result)
+                    # Large results stay in the result store; the prompt only gets a preview
+                    result_text = result_store.describe(result_value(result))
                     print(f"Tool result: {result_text}")
                     
                     # If this is an ASCII calculation, format it as a final answer
-                    if func_name == "strings_to_chars_to_int":
+                    if first_result_is_answer and func_name == "strings_to_chars_to_int":
                         result_values = []
                         for content in result.content:
                             if hasattr(content, 'text'):
                                 result_values.append(content.text)
                         return f"FINAL_ANSWER: [{', '.join(result_values)}]"
                     
-                    iteration_response.append(result_text)
+                    iteration_response.append(
+                        f"In iteration {iteration + 1} you called {func_name} with {params} "
+                        f"and it returned {result_text}."
+                    )
                     last_response = result
                     
                 except Exception as e:
@@ -140,6 +330,151 @@ async def handle_math_query(session, query):
     
     return "FINAL_ANSWER: [Error: Max iterations reached]"
 
+async def call_plan_tool(session, name, arguments):
+    """Call the tool for one plan step and return its output value"""
+    tool = next((t for t in tools if t.name == name), None)
+    if not tool:
+        raise ValueError(f"Unknown tool: {name}")
+    result = await session.call_tool(name, arguments=build_arguments(tool, arguments))
+    if result.isError:
+        raise RuntimeError(result_value(result))
+    return result_value(result)
+
+async def solve_plan_query(session, query, priority="interactive"):
+    """Get the whole plan from the model in one reply and run it; ask again only if it fails"""
+    current_query = query
+    query_start = time.perf_counter()
+    widen = 1
+    for attempt in range(max_iterations):
+        print(f"\n--- Plan attempt {attempt + 1} ---")
+        prompt = f"{query_system_prompt(query, widen)}\n\nQuery: {current_query}"
+        try:
+            response = await limited_generate(
+                generate_with_timeout, prompt, query_declarations(query, widen), priority
+            )
+        except Exception as e:
+            print(f"Failed to get LLM response: {e}")
+            break
+        response_text = response.text.strip()
+        print(f"LLM Response: {response_text}")
+        query_stats["llm_responses"] += 1
+
+        if response_text.startswith("FINAL_ANSWER:"):
+            return response_text
+
+        outputs = {}
+        try:
+            if not response_text.startswith("PLAN:"):
+                raise PlanError("Reply was not a PLAN: or FINAL_ANSWER: line")
+            plan = parse_plan(response_text)
+        except PlanError as e:
+            print(f"Could not parse plan: {e}")
+            query_stats["parse_failures"] += 1
+            error = e
+        else:
+            try:
+                print(f"Executing plan with {len(plan['steps'])} steps")
+                if attempt == 0:
+                    query_stats["first_tool_calls"] += 1
+                    query_stats["time_to_first_tool_call_s"] += time.perf_counter() - query_start
+                answer = await execute_plan(plan, partial(call_plan_tool, session), outputs)
+                if isinstance(answer, list):
+                    return f"FINAL_ANSWER: [{', '.join(str(value) for value in answer)}]"
+                return f"FINAL_ANSWER: [{answer}]"
+            except PlanError as e:
+                print(f"Plan failed: {e}")
+                error = e
+                if str(e.__cause__).startswith("Unknown tool"):
+                    widen *= 2
+                    query_stats["tool_set_widened"] += 1
+
+        # Only a failure goes back to the model, with the outputs of the steps that did complete
+        completed = ", ".join(f"{step_id} = {result_store.describe(value)}" for step_id, value in outputs.items())
+        current_query = (
+            f"{query}\n\nYour previous reply failed: {error}. "
+            f"Completed steps: {completed or 'none'}. Respond with a corrected PLAN or a FINAL_ANSWER."
+        )
+
+    return "FINAL_ANSWER: [Error: Max iterations reached]"
+
+def build_system_prompt(tools):
+    """Create the system prompt listing the available tools"""
+    tools_description = []
+    for i, tool in enumerate(tools):
+        try:
+            params = tool.inputSchema
+            desc = getattr(tool, 'description', 'No description available')
+            name = getattr(tool, 'name', f'tool_{i}')
+            
+            if 'properties' in params:
+                param_details = []
+                for param_name, param_info in params['properties'].items():
+                    param_type = param_info.get('type', 'unknown')
+                    param_details.append(f"{param_name}: {param_type}")
+                params_str = ', '.join(param_details)
+            else:
+                params_str = 'no parameters'
+
+            tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
+            tools_description.append(tool_desc)
+        except Exception as e:
+            print(f"Error processing tool {i}: {e}")
+            tools_description.append(f"{i+1}. Error processing tool")
+    
+    tools_description = "\n".join(tools_description)
+    
+    if agent_mode == "plan":
+        return f"""You are an agent that can perform mathematical calculations. You have access to various tools.
+
+Available tools:
+{tools_description}
+
+Plan the whole calculation at once. You must respond with EXACTLY ONE line in one of these formats (no additional text):
+1. For a plan of tool calls:
+   PLAN: {{"steps": [{{"id": "step_id", "tool": "function_name", "args": {{"param": value}}}}, ...], "answer": "$step_id"}}
+
+2. For final answers:
+   FINAL_ANSWER: [result]
+
+Important:
+- Use "$step_id" as an argument value to pass the output of an earlier step to a later one
+- Steps that do not depend on each other are run in parallel
+- "answer" names the step whose output is the final result
+- Large results are shown as a handle like $r1 with a preview; use the handle as an argument to reuse the full result
+
+Example:
+PLAN: {{"steps": [{{"id": "ascii", "tool": "strings_to_chars_to_int", "args": {{"string": "INDIA"}}}}, {{"id": "total", "tool": "int_list_to_exponential_sum", "args": {{"int_list": "$ascii"}}}}], "answer": "$total"}}
+
+DO NOT include any explanations or additional text.
+Your entire response should be a single line starting with either PLAN: or FINAL_ANSWER:"""
+
+    return f"""You are an agent that can perform both mathematical calculations and Freeform operations. You have access to various tools.
+
+Available tools:
+{tools_description}
+
+You must respond with EXACTLY ONE line in one of these formats (no additional text):
+1. For function calls:
+   FUNCTION_CALL: function_name|param1|param2|...
+   
+2. For final answers:
+   FINAL_ANSWER: [result]
+
+Important:
+- When a function returns multiple values, you need to process all of them
+- Only give FINAL_ANSWER when you have completed all necessary calculations
+- Do not repeat function calls with the same parameters
+- Large results are shown as a handle like $r1 with a preview; pass the handle as a parameter to reuse the full result
+{"- You can also call the tools directly as native function calls" if function_calling == "native" else ""}
+
+Examples:
+- FUNCTION_CALL: add|5|3
+- FUNCTION_CALL: open_freeform
+- FINAL_ANSWER: [42]
+
+DO NOT include any explanations or additional text.
+Your entire response should be a single line starting with either FUNCTION_CALL: or FINAL_ANSWER:"""
+
 async def handle_freeform_query(session, query):
     """Handle Freeform-related queries"""
     try:
@@ -180,96 +515,60 @@ async def handle_freeform_query(session, query):
     except Exception as e:
         return f"Error: {str(e)}"
 
+async def prepare_session(session):
+    """Initialize the session and build what every query needs: tool list, system prompt, declarations"""
+    global tools, system_prompt, tool_declarations, tool_index
+    print("Session created, initializing...")
+    await session.initialize()
+
+    # Get available tools
+    print("Requesting tool list...")
+    tools_result = await session.list_tools()
+    tools = tools_result.tools
+    print(f"Successfully retrieved {len(tools)} tools")
+
+    # Create system prompt
+    system_prompt = build_system_prompt(tools)
+    if tool_top_k:
+        tool_index = ToolIndex(tools)
+    if function_calling == "native":
+        tool_declarations = function_declarations(tools)
+
+async def answer_query(session, query, priority="interactive"):
+    """Route one query to the Freeform or math handler and reset state for the next one"""
+    # Determine query type and handle accordingly
+    if any(word in query.lower() for word in ['freeform', 'rectangle', 'text', 'draw']):
+        result = await handle_freeform_query(session, query)
+    else:
+        result = await handle_math_query(session, query, priority)
+    reset_state()  # Reset state for next query
+    return result
+
 async def main():
+    global model
     reset_state()  # Reset at the start of main
     print("Starting main execution...")
     try:
+        if model is None:
+            model = load_model()
+
         # Create a single MCP server connection
+        # Set MCP_TRANSPORT=memory to host the server in this process instead of a stdio subprocess
         print("Establishing connection to MCP server...")
-        server_params = StdioServerParameters(
-            command="python3",
-            args=["example2-3.py"]  # Using example2-3.py which has both math and Freeform tools
-        )
-
-        async with stdio_client(server_params) as (read, write):
+        # Using example2-3.py which has both math and Freeform tools
+        async with open_transport("example2-3.py") as (read, write):
             print("Connection established, creating session...")
             async with ClientSession(read, write) as session:
-                print("Session created, initializing...")
-                await session.initialize()
-                
-                # Get available tools
-                print("Requesting tool list...")
-                tools_result = await session.list_tools()
-                global tools  # Make tools available globally
-                tools = tools_result.tools
-                print(f"Successfully retrieved {len(tools)} tools")
-
-                # Create tools description
-                tools_description = []
-                for i, tool in enumerate(tools):
-                    try:
-                        params = tool.inputSchema
-                        desc = getattr(tool, 'description', 'No description available')
-                        name = getattr(tool, 'name', f'tool_{i}')
-                        
-                        if 'properties' in params:
-                            param_details = []
-                            for param_name, param_info in params['properties'].items():
-                                param_type = param_info.get('type', 'unknown')
-                                param_details.append(f"{param_name}: {param_type}")
-                            params_str = ', '.join(param_details)
-                        else:
-                            params_str = 'no parameters'
-
-                        tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
-                        tools_description.append(tool_desc)
-                    except Exception as e:
-                        print(f"Error processing tool {i}: {e}")
-                        tools_description.append(f"{i+1}. Error processing tool")
-                
-                tools_description = "\n".join(tools_description)
-                
-                # Create system prompt
-                global system_prompt
-                system_prompt = f"""You are an agent that can perform both mathematical calculations and Freeform operations. You have access to various tools.
-
-Available tools:
-{tools_description}
-
-You must respond with EXACTLY ONE line in one of these formats (no additional text):
-1. For function calls:
-   FUNCTION_CALL: function_name|param1|param2|...
-   
-2. For final answers:
-   FINAL_ANSWER: [result]
-
-Important:
-- When a function returns multiple values, you need to process all of them
-- Only give FINAL_ANSWER when you have completed all necessary calculations
-- Do not repeat function calls with the same parameters
-
-Examples:
-- FUNCTION_CALL: add|5|3
-- FUNCTION_CALL: open_freeform
-- FINAL_ANSWER: [42]
-
-DO NOT include any explanations or additional text.
-Your entire response should be a single line starting with either FUNCTION_CALL: or FINAL_ANSWER:"""
+                await prepare_session(session)
 
                 while True:
                     # Get user input
                     query = input("\nEnter your query (or 'quit' to exit): ")
                     if query.lower() == 'quit':
                         break
-                        
-                    # Determine query type and handle accordingly
-                    if any(word in query.lower() for word in ['freeform', 'rectangle', 'text', 'draw']):
-                        result = await handle_freeform_query(session, query)
-                    else:
-                        result = await handle_math_query(session, query)
-                    
+
+                    result = await answer_query(session, query)
                     print(f"\nResult: {result}")
-                    reset_state()  # Reset state for next query
 
     except Exception as e:
         print(f"Error in main execution: {e}")
@@ -0,0 +1,62 @@
+import char_codes
+from char_codes import aggregate_codes, code_counts, codes_from_bytes, codes_list, codes_text, text_codes
+from collections import Counter
+import math
+
+TEXTS = ["", "INDIA", "Hello, world!\r\n" * 50, "naïve café – 東京 😀", "\x00\x7f\x80\uffff\U0010ffff"]
+
+def expect_error(codes):
+    try:
+        text = codes_text(codes)
+    except ValueError as e:
+        print(f"{codes!r} rejected: {e}")
+        assert "between 0 and 1114111" in str(e), str(e)
+        return
+    raise AssertionError(f"{codes!r} should have been rejected, got {text!r}")
+
+def check_codes(path):
+    for text in TEXTS:
+        expected = [ord(char) for char in text]
+        # Codes from the string and from its UTF-8 bytes match the old per-character loop
+        assert codes_list(text_codes(text)) == expected, (path, text)
+        assert codes_list(codes_from_bytes(text.encode("utf-8"))) == expected, (path, text)
+        assert codes_text(text_codes(text)) == text, (path, text)
+        assert codes_text(expected) == text, (path, text)
+
+        # exp() overflows a float above code 709, for the old loop as well
+        small_codes = all(code < 700 for code in expected)
+        aggregates = ["sum", "exp_sum", "histogram"] if small_codes else ["sum", "histogram"]
+        results = aggregate_codes(text_codes(text), aggregates)
+        assert results["sum"] == sum(expected), (path, text)
+        if small_codes:
+            old_exp_sum = sum(math.exp(i) for i in expected)
+            assert math.isclose(results["exp_sum"], old_exp_sum, rel_tol=1e-12), (path, text, results["exp_sum"])
+        assert results["histogram"] == dict(sorted(Counter(expected).items())), (path, text)
+        assert code_counts(text_codes(text)) == dict(Counter(expected)), (path, text)
+    print(f"{path}: codes, round trips and aggregates match for {len(TEXTS)} texts")
+
+    for codes in ([-1], [0x110000], [65, 66, 0x110000], [65.5]):
+        expect_error(codes)
+    try:
+        aggregate_codes(text_codes("abc"), ["sum", "median"])
+    except ValueError as e:
+        print(f"Unknown aggregate rejected: {e}")
+    else:
+        raise AssertionError("median should have been rejected")
+
+def main():
+    numpy = char_codes.np
+    if numpy is None:
+        print("NumPy is not installed; only the fallback path is checked")
+    else:
+        check_codes("numpy")
+    # The plain bytes/Counter fallback used when NumPy is missing
+    char_codes.np = None
+    try:
+        check_codes("fallback")
+    finally:
+        char_codes.np = numpy
+    print("Test completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+from expression_eval import MAX_EXPONENT, MAX_FACTORIAL, compile_expression, evaluate, evaluate_many
+
+def expect_error(expression, variables=None, message=""):
+    try:
+        result = evaluate(expression, variables)
+    except ValueError as e:
+        print(f"{expression!r} rejected: {e}")
+        assert message in str(e), (expression, str(e))
+        return
+    raise AssertionError(f"{expression!r} should have been rejected, got a {type(result).__name__}")
+
+def main():
+    # Arithmetic with the ^ power operator, whitelisted functions and constants
+    assert evaluate("(3^4 + sqrt(16)) % 7") == 1.0
+    assert evaluate("2^3^2") == 2 ** 3 ** 2
+    assert evaluate("factorial(5) + cbrt(27)") == 123.0
+    assert abs(evaluate("cos(pi)") + 1) < 1e-12
+    assert evaluate("x * 10^20", {"x": 1}) == 10 ** 20
+
+    # Anything beyond arithmetic is rejected before it runs
+    expect_error("(1).__class__", message="Attribute")
+    expect_error("__import__('os')", message="Unsupported function")
+    expect_error("_power(2, 3)", message="Unsupported function")
+    expect_error("_x + 1", {"_x": 1}, message="Unsupported name")
+    expect_error("1 < 2", message="Compare")
+    expect_error("print(1)", message="Unsupported function")
+    expect_error("abs(-1)", message="Unsupported function")
+    expect_error("sqrt", message="must be called")
+    expect_error("sqrt(1, 2)", message="exactly one argument")
+    expect_error("'a' * 3", message="Unsupported constant")
+    expect_error("[1, 2]", message="List")
+    expect_error("2 +", message="Invalid expression")
+
+    # Roots of negative numbers have no real value
+    expect_error("sqrt(-1)", message="no real value")
+    expect_error("cbrt(-8)", message="no real value")
+    expect_error("(-8)^(1/3)", message="no real value")
+
+    # Exponent and factorial caps
+    assert evaluate(f"2^{MAX_EXPONENT}") == 2 ** MAX_EXPONENT
+    expect_error(f"2^{MAX_EXPONENT + 1}", message="Exponent")
+    expect_error(f"1000000^{MAX_EXPONENT}", message="bits")
+    expect_error("2^x", {"x": MAX_EXPONENT + 1}, message="Exponent")
+    assert evaluate(f"factorial({MAX_FACTORIAL})") > 0
+    expect_error(f"factorial({MAX_FACTORIAL + 1})", message="larger than")
+
+    # Compiled expressions are cached by their text
+    compile_expression.cache_clear()
+    compiled = compile_expression("x^2 + y")
+    assert compile_expression("x^2 + y") is compiled
+    assert compiled.variables == {"x", "y"}
+    info = compile_expression.cache_info()
+    print(f"Compile cache: {info}")
+    assert (info.hits, info.misses) == (1, 1), info
+
+    # evaluate_many compiles once and checks every set of variables
+    assert evaluate_many("x^2 + y", [{"x": 1, "y": 2}, {"x": 3, "y": 4}]) == [3, 13]
+    assert compile_expression.cache_info().hits == 2
+    for bindings, message in [
+        ([{"x": 1}], "Missing value for variable(s): y"),
+        ([{"x": 1, "y": 2}, {}], "Missing value for variable(s): x, y"),
+        ([{"x": "1", "y": 2}], "Variable x must be a number"),
+        ([{"x": True, "y": 2}], "Variable x must be a number"),
+        ([{"x": None, "y": 2}], "Variable x must be a number"),
+    ]:
+        try:
+            evaluate_many("x^2 + y", bindings)
+        except ValueError as e:
+            print(f"{bindings} rejected: {e}")
+            assert message in str(e), (bindings, str(e))
+        else:
+            raise AssertionError(f"{bindings} should have been rejected")
+    print("Test completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from mcp import ClientSession
+from llm_limiter import RateLimiter
+from llm_models import ScriptedModel
+from mcp_transport import load_module, open_transport
+import asyncio
+import time
+
+async def check_priority():
+    # One request per 0.05 s; the first goes straight through, the rest queue
+    limiter = RateLimiter(requests_per_minute=1, period=0.05)
+    await limiter.acquire()
+    order = []
+    async def request(name, priority):
+        await limiter.acquire(priority=priority)
+        order.append(name)
+    batch = [asyncio.create_task(request(f"batch{i}", "batch")) for i in range(4)]
+    await asyncio.sleep(0.01)
+    interactive = [asyncio.create_task(request(f"interactive{i}", "interactive")) for i in range(2)]
+    await asyncio.gather(*batch, *interactive)
+    print(f"Grant order: {order}")
+    # The interactive queries arrived later but are served before the batch queue
+    assert order[:2] == ["interactive0", "interactive1"], order
+    stats = limiter.stats()
+    print(f"Queue wait: {stats}")
+    assert stats["batch"]["max_wait_s"] > stats["interactive"]["max_wait_s"], stats
+
+async def check_token_budget():
+    # 1000 prompt tokens per 0.2 s: a second 800-token prompt waits for 600 tokens to refill
+    limiter = RateLimiter(tokens_per_minute=1000, period=0.2)
+    await limiter.acquire(800)
+    waited = await limiter.acquire(800)
+    print(f"Second 800-token prompt waited {waited * 1000:.0f} ms")
+    # Loose bounds: the exact wait depends on scheduler jitter
+    assert 0.05 < waited < 1.0, waited
+
+async def check_quota_retry():
+    agent = load_module("talk2mcp-2.py")
+    agent.limiter = RateLimiter()
+
+    async with open_transport("example2-3.py", "memory") as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            agent.tools = (await session.list_tools()).tools
+            agent.system_prompt = agent.build_system_prompt(agent.tools)
+
+            # The model first refuses with a retry-after hint, as Gemini does for 429s
+            agent.reset_state()
+            agent.model = ScriptedModel(
+                [{"quota_error": {"retry_after": 0.2}}, "FUNCTION_CALL: add|2|3", "FINAL_ANSWER: [5]"]
+            )
+            start = time.perf_counter()
+            answer = await agent.handle_math_query(session, "Add 2 and 3")
+            elapsed = time.perf_counter() - start
+            print(f"{answer} after {elapsed * 1000:.0f} ms")
+            assert answer == "FINAL_ANSWER: [5]", answer
+            assert elapsed >= 0.2, elapsed
+            assert agent.limiter.stats()["quota_errors"] == 1
+
+async def check_query_priority():
+    agent = load_module("talk2mcp-2.py")
+    # One LLM call per 0.1 s, and the first slot is already taken
+    agent.limiter = RateLimiter(requests_per_minute=1, period=0.1)
+
+    async with open_transport("example2-3.py", "memory") as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            agent.tools = (await session.list_tools()).tools
+            agent.system_prompt = agent.build_system_prompt(agent.tools)
+
+            for agent_priority, other_priority in [("batch", "interactive"), ("interactive", "batch")]:
+                await agent.limiter.acquire()
+                order = []
+                async def query():
+                    agent.reset_state()
+                    agent.model = ScriptedModel(["FINAL_ANSWER: [5]"])
+                    await agent.handle_math_query(session, "Add 2 and 3", priority=agent_priority)
+                    order.append(agent_priority)
+                async def other():
+                    await agent.limiter.acquire(priority=other_priority)
+                    order.append(other_priority)
+                # The agent's query queues first; an interactive request arriving later still goes ahead
+                first = asyncio.create_task(query())
+                await asyncio.sleep(0.01)
+                await asyncio.gather(first, other())
+                print(f"Agent query at {agent_priority}: grant order {order}")
+                assert order == ["interactive", "batch"], order
+            assert agent.limiter.stats()["batch"]["granted"] == 2
+
+async def main():
+    await check_priority()
+    await check_token_budget()
+    await check_quota_retry()
+    await check_query_priority()
+    print("Test completed!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
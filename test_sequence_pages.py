@@ -0,0 +1,100 @@
+from mcp import ClientSession
+from mcp_transport import open_transport
+from result_store import result_value
+from sequence_pages import FibonacciPager, file_chars_page
+from collections import Counter
+import asyncio
+import json
+import os
+import tempfile
+
+def tool_value(result):
+    assert not result.isError, result.content[0].text
+    return result_value(result)
+
+async def check_fibonacci_pages(session):
+    expected = tool_value(await session.call_tool("fibonacci_numbers", {"n": 2500}))
+    pager = FibonacciPager(max_saved=2)
+    # Consecutive pages resume the paused generator instead of starting a new one
+    values = []
+    for start in range(0, 2500, 500):
+        page = pager.page(start, 500)
+        assert page["next"] == f"fib://{start + 500}/500", page["next"]
+        values.extend(page["values"])
+    print(f"Pager after 5 consecutive pages: started {pager.started}, resumed {pager.resumed}")
+    assert values == expected
+    assert (pager.started, pager.resumed) == (1, 4)
+    # A page somewhere else starts a fresh generator by fast doubling
+    assert pager.page(1234, 10)["values"] == expected[1234:1244]
+    assert (pager.started, pager.resumed) == (2, 4)
+    # Only max_saved generators are kept; the oldest (after 2500) was dropped
+    pager.page(7, 3)
+    assert sorted(pager.generators) == [10, 1244], sorted(pager.generators)
+    assert pager.page(2500, 1)["values"] == [expected[-1] + expected[-2]]
+    assert pager.started == 4
+
+    # The fib:// resource serves the same pages
+    contents = await session.read_resource("fib://100/20")
+    assert json.loads(contents.contents[0].text)["values"] == expected[100:120]
+
+    for start, count in [(-1, 10), (0, 0), (0, 1001)]:
+        try:
+            pager.page(start, count)
+        except ValueError as e:
+            print(f"page({start}, {count}) rejected: {e}")
+        else:
+            raise AssertionError(f"page({start}, {count}) should have been rejected")
+
+async def check_file_pages(session, path):
+    # Windows line endings and non-ASCII text, paged in steps that split the \r\n pairs
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Line one\r\nnaïve café\r\n東京\r\n" * 20)
+    with open(path, "rb") as f:
+        expected = [ord(char) for char in f.read().decode("utf-8")]
+    values, cursor, pages = [], "", 0
+    while cursor is not None:
+        page = file_chars_page(path, cursor, 7)
+        values.extend(page["values"])
+        cursor = page["next_cursor"]
+        pages += 1
+    print(f"Read {len(values)} codes in {pages} pages")
+    assert values == expected
+    assert values.count(13) == values.count(10) == 60
+
+    # The same codes file_codes reads from the raw bytes
+    aggregates = tool_value(await session.call_tool("file_codes", {"path": path, "aggregates": ["sum", "histogram"]}))
+    assert aggregates["sum"] == sum(values)
+    assert {int(code): count for code, count in aggregates["histogram"].items()} == dict(Counter(values))
+    # ... and the file_chars_to_int tool over MCP
+    tool_page = tool_value(await session.call_tool("file_chars_to_int", {"path": path, "count": 20}))
+    assert tool_page["values"] == expected[:20]
+
+    # A cursor is rejected once the file changes under it
+    cursor = file_chars_page(path, "", 5)["next_cursor"]
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    try:
+        file_chars_page(path, cursor, 5)
+    except ValueError as e:
+        print(f"Stale cursor rejected: {e}")
+        assert "changed" in str(e)
+    else:
+        raise AssertionError("A cursor from before the file changed should have been rejected")
+    try:
+        file_chars_page(path, "not-a-cursor", 5)
+    except ValueError as e:
+        print(f"Bad cursor rejected: {e}")
+    else:
+        raise AssertionError("An invalid cursor should have been rejected")
+
+async def main():
+    async with open_transport("example2-3.py", "memory") as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await check_fibonacci_pages(session)
+            with tempfile.TemporaryDirectory() as directory:
+                await check_file_pages(session, os.path.join(directory, "crlf.txt"))
+    print("Test completed!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+from mcp import ClientSession
+from llm_models import ScriptedModel
+from mcp_transport import load_module, open_transport
+import asyncio
+import time
+
+# The model explains itself after the FUNCTION_CALL line; with streaming the tool runs before that arrives
+REPLY = "FUNCTION_CALL: add|2|3\nI am adding 2 and 3 because the query asks for their sum, then I will report it."
+CHUNK_LATENCY = 0.05
+
+async def main():
+    agent = load_module("talk2mcp-2.py")
+
+    async with open_transport("example2-3.py", "memory") as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            print("Connected to MCP server")
+            agent.tools = (await session.list_tools()).tools
+            agent.system_prompt = agent.build_system_prompt(agent.tools)
+
+            timings = {}
+            for streaming in (False, True):
+                agent.reset_state()
+                agent.streaming = streaming
+                agent.model = ScriptedModel([REPLY, "FINAL_ANSWER: [5]"], chunk_latency=CHUNK_LATENCY)
+                stream_time = len(agent.model._chunks(REPLY)) * CHUNK_LATENCY
+
+                # Note when the tool call goes out, relative to the start of the query
+                call_tool = session.call_tool
+                dispatched = []
+                async def timed_call_tool(name, arguments=None):
+                    dispatched.append(time.perf_counter() - start)
+                    return await call_tool(name, arguments=arguments)
+                session.call_tool = timed_call_tool
+
+                start = time.perf_counter()
+                answer = await agent.handle_math_query(session, "Add 2 and 3")
+                session.call_tool = call_tool
+
+                print(f"streaming={streaming}: {answer}, tool called after {dispatched[0] * 1000:.0f} ms "
+                      f"(whole reply takes {stream_time * 1000:.0f} ms)")
+                assert answer == "FINAL_ANSWER: [5]", answer
+                timings[streaming] = dispatched[0]
+
+            # The FUNCTION_CALL line is in the first few chunks, so the tool must not wait for the rest
+            assert timings[True] < stream_time / 2, timings
+            assert timings[False] >= stream_time - 2 * CHUNK_LATENCY, timings
+
+            print("Test completed!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+from tool_cache import ToolCache, cache_from_env
+import os
+
+def check_scalar_types():
+    # 1, 1.0 and True compare equal but must not share a cached result
+    cache = ToolCache()
+    @cache.pure
+    def describe(x):
+        return repr(x)
+    assert [describe(1), describe(1.0), describe(True)] == ["1", "1.0", "True"]
+    assert [describe([1]), describe([1.0])] == ["[1]", "[1.0]"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 5, 5), stats
+    # Keyword and positional calls with defaults filled in share an entry
+    @cache.pure
+    def scaled(values, factor=2):
+        return [value * factor for value in values]
+    assert scaled([1, 2]) == scaled(values=[1, 2]) == scaled([1, 2], factor=2) == [2, 4]
+    assert cache.tool_hits == {"scaled": 2}, cache.tool_hits
+
+def check_copies():
+    # A caller that changes a returned list must not change the cached entry
+    cache = ToolCache()
+    @cache.pure
+    def numbers(n):
+        return {"values": list(range(n))}
+    first = numbers(5)
+    first["values"].append(99)
+    second = numbers(5)
+    assert second == {"values": [0, 1, 2, 3, 4]}, second
+    second["values"].clear()
+    assert numbers(5) == {"values": [0, 1, 2, 3, 4]}
+    assert cache.hits == 2
+
+def check_eviction():
+    def block(i):
+        return [i] * 1000
+    # Size one entry, then allow a little over two of them
+    sizing = ToolCache()
+    sizing.pure(block)(0)
+    entry_bytes = sizing.bytes
+    cache = ToolCache(max_bytes=int(entry_bytes * 2.5))
+    cached_block = cache.pure(block)
+    for i in range(3):
+        cached_block(i)
+    print(f"Byte budget {cache.max_bytes}: {cache.stats()}")
+    assert len(cache.entries) == 2 and cache.evictions == 1 and cache.bytes <= cache.max_bytes
+    # The least recently used entry (block 0) went first
+    cached_block(1)
+    cached_block(0)
+    assert cache.hits == 1 and cache.misses == 4 and cache.evictions == 2
+
+    cache = ToolCache(max_entries=3)
+    cached_block = cache.pure(block)
+    for i in range(5):
+        cached_block(i)
+    assert len(cache.entries) == 3 and cache.evictions == 2, cache.stats()
+
+def check_oversized():
+    cache = ToolCache(max_bytes=100000)
+    @cache.pure
+    def length(values):
+        return len(values)
+    @cache.pure
+    def zeros(n):
+        return [0] * n
+    # Too large to cache, as an argument or as a result: calls go through but nothing is stored
+    assert length(list(range(100000))) == length(list(range(100000))) == 100000
+    assert len(zeros(100000)) == len(zeros(100000)) == 100000
+    assert zeros(10) == zeros(10) == [0] * 10
+    stats = cache.stats()
+    print(f"Oversized calls skipped: {stats}")
+    assert stats["entries"] == 1 and stats["hits"] == 1 and stats["bytes"] <= stats["max_bytes"], stats
+
+def check_disabled():
+    os.environ["TOOL_CACHE_BYTES"] = "0"
+    try:
+        cache = cache_from_env()
+    finally:
+        del os.environ["TOOL_CACHE_BYTES"]
+    calls = []
+    @cache.pure
+    def square(x):
+        calls.append(x)
+        return x * x
+    assert square(3) == square(3) == 9
+    assert calls == [3, 3], calls
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 0, 0), stats
+
+def check_stats():
+    cache = ToolCache(max_bytes=1 << 20, max_entries=10)
+    @cache.pure
+    def double(x):
+        return 2 * x
+    for x in [1, 2, 1, 1]:
+        double(x)
+    stats = cache.stats()
+    print(f"Stats: {stats}")
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["hit_rate"] == 0.5
+    assert stats["entries"] == 2 and stats["evictions"] == 0 and stats["bytes"] > 0
+    assert (stats["max_bytes"], stats["max_entries"]) == (1 << 20, 10)
+    assert stats["hits_by_tool"] == {"double": 2}
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+def main():
+    check_scalar_types()
+    check_copies()
+    check_eviction()
+    check_oversized()
+    check_disabled()
+    check_stats()
+    print("Test completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import inspect
+import os
+import sys
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+
+
+def byte_size(value, limit=None):
+    """Approximate memory held by a value; big ints and long lists count by their real size
+
+    With a limit the walk stops as soon as the total passes it, so an oversized list is
+    rejected by the size of its own pointer array without visiting its items.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif isinstance(value, dict):
+        items = chain.from_iterable(value.items())
+    else:
+        return size
+    for item in items:
+        if limit is not None and size > limit:
+            break
+        if isinstance(item, (list, tuple, dict)):
+            size += byte_size(item, None if limit is None else limit - size)
+        else:
+            size += sys.getsizeof(item)
+    return size
+
+
+def normalize(value):
+    """A hashable form of an argument value: lists become tuples, dicts sorted item tuples
+
+    Scalars keep their type, since 1, 1.0 and True compare equal but need not give the
+    same result.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalize(item)) for key, item in value.items()))
+    return (type(value).__name__, value)
+
+
+def _copy(value):
+    """A copy of a result's lists and dicts, so callers cannot change a cached entry"""
+    if isinstance(value, list):
+        return [_copy(item) if isinstance(item, (list, dict)) else item for item in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) if isinstance(item, (list, dict)) else item for key, item in value.items()}
+    return value
+
+
+class ToolCache:
+    """Bounded LRU of pure tool results, evicting by total byte size as well as entry count
+
+    Keys are the tool name plus its normalized arguments, with defaults filled in, so
+    add_list([1, 2]) and add_list(l=[1, 2]) share an entry. Results are copied on the way in
+    and out, so a caller can modify what it gets back. Exceptions are never cached,
+    and neither are arguments or a result that would take more than the whole budget.
+    A max_bytes of 0 turns the cache off.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, max_entries=1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (result, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tool_hits = {}
+
+    def pure(self, fn):
+        """Mark a tool function as pure: same arguments, same result, no side effects"""
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def memoized(*args, **kwargs):
+            if not self.max_bytes:
+                return fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # Size the arguments before normalizing them, so oversized ones are not copied
+            key_size = byte_size(bound.arguments, self.max_bytes)
+            if key_size > self.max_bytes:
+                return fn(*args, **kwargs)
+            try:
+                key = (fn.__name__, normalize(bound.arguments))
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.tool_hits[fn.__name__] = self.tool_hits.get(fn.__name__, 0) + 1
+                return _copy(self.entries[key][0])
+            self.misses += 1
+            result = fn(*args, **kwargs)
+            self.put(key, result, key_size)
+            return result
+        return memoized
+
+    def put(self, key, result, key_size):
+        size = key_size + byte_size(result, self.max_bytes - key_size)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (_copy(result), size)
+        self.bytes += size
+        while self.bytes > self.max_bytes or len(self.entries) > self.max_entries:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Hit rate, evictions and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits_by_tool": dict(self.tool_hits),
+        }
+
+
+def cache_from_env():
+    """A ToolCache sized by TOOL_CACHE_BYTES and TOOL_CACHE_ENTRIES (0 bytes disables caching)"""
+    return ToolCache(
+        max_bytes=int(os.getenv("TOOL_CACHE_BYTES", str(8 * 1024 * 1024))),
+        max_entries=int(os.getenv("TOOL_CACHE_ENTRIES", "1024")),
+    )
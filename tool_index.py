@@ -0,0 +1,70 @@
+import math
+import re
+from collections import Counter
+
+# Words that say nothing about which tool a query needs
+STOPWORDS = {
+    "a", "an", "and", "all", "are", "at", "be", "by", "calculate", "compute", "find", "for", "from",
+    "give", "i", "in", "is", "it", "me", "number", "of", "on", "please", "the", "then", "these", "this",
+    "those", "to", "what", "with", "you",
+}
+
+
+def tokenize(text):
+    """Lowercase words (snake_case and camelCase split, plurals folded) and arithmetic operators"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text).replace("_", " ").lower()
+    tokens = []
+    for token in re.findall(r"[a-z]+|[-+*/%^]", text):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        if token in STOPWORDS or (len(token) == 1 and token.isalpha()):
+            continue
+        tokens.append(token)
+    return tokens
+
+
+class ToolIndex:
+    """BM25 index over tool names, descriptions and parameter names, built locally"""
+
+    def __init__(self, tools, k1=1.5, b=0.75):
+        self.tools = list(tools)
+        self.k1 = k1
+        self.b = b
+        self.documents = []
+        for tool in self.tools:
+            params = " ".join(tool.inputSchema.get("properties", {}))
+            # The name counts twice: "factorial" in the name says more than in a description
+            self.documents.append(Counter(tokenize(f"{tool.name} {tool.name} {tool.description or ''} {params}")))
+        self.avg_length = sum(sum(doc.values()) for doc in self.documents) / max(len(self.documents), 1)
+        document_frequency = Counter(token for doc in self.documents for token in doc)
+        n = len(self.documents)
+        self.idf = {
+            token: math.log(1 + (n - count + 0.5) / (count + 0.5)) for token, count in document_frequency.items()
+        }
+
+    def scores(self, query):
+        """BM25 score of every tool for a query, in tool order"""
+        query_tokens = tokenize(query)
+        scores = []
+        for doc in self.documents:
+            length = sum(doc.values())
+            score = 0.0
+            for token in query_tokens:
+                tf = doc.get(token, 0)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / self.avg_length)
+                    score += self.idf[token] * tf * (self.k1 + 1) / norm
+            scores.append(score)
+        return scores
+
+    def search(self, query, k):
+        """The k best-scoring tools for a query, in their original order
+
+        Tools that share no word with the query are never picked; when no tool matches at
+        all, every tool is returned so the model is not left without the one it needs.
+        """
+        scores = self.scores(query)
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])[:k]
+        if not ranked:
+            return list(self.tools)
+        return [self.tools[i] for i in sorted(ranked)]
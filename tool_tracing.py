@@ -0,0 +1,153 @@
+import atexit
+import inspect
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from functools import wraps
+
+# Upper bounds of the latency histogram buckets in milliseconds; one more bucket catches the rest
+LATENCY_BUCKETS_MS = (0.01, 0.1, 1, 10, 100, 1000)
+
+
+def _size(value):
+    """Cheap size estimate: length of strings, bytes and containers, 1 for scalars"""
+    try:
+        return len(value)
+    except TypeError:
+        return 1
+
+
+class ToolTracer:
+    """Record tool calls into an in-memory ring buffer and keep per-tool latency histograms
+
+    Every call updates the histograms; a `sample_rate` fraction of calls is also kept as a
+    record and written to `sink` as JSON lines once `batch_size` records are pending.
+    Nothing is ever written to stdout, which is the JSON-RPC channel in stdio mode.
+    """
+
+    def __init__(self, capacity=1024, sample_rate=1.0, batch_size=100, sink=None):
+        self.records = deque(maxlen=capacity)
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.sink = sink
+        self.stats = {}
+        self._pending = 0
+
+    def record(self, name, args, kwargs, duration, result=None, error=None):
+        """Account for one finished tool call"""
+        duration_ms = duration * 1000
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = {
+                "calls": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        stats["calls"] += 1
+        stats["total_ms"] += duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        if error is not None:
+            stats["errors"] += 1
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS_MS) and duration_ms > LATENCY_BUCKETS_MS[bucket]:
+            bucket += 1
+        stats["histogram"][bucket] += 1
+
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.records.append({
+            "time": time.time(),
+            "tool": name,
+            "arg_sizes": [_size(arg) for arg in args] + [_size(arg) for arg in kwargs.values()],
+            "duration_ms": duration_ms,
+            "result_size": None if error is not None else _size(result),
+            "error": None if error is None else f"{type(error).__name__}: {error}",
+        })
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the records not yet exported to the sink"""
+        pending = min(self._pending, len(self.records))
+        self._pending = 0
+        if self.sink is None or pending == 0:
+            return
+        batch = list(self.records)[-pending:]
+        self.sink.write("".join(json.dumps(record) + "\n" for record in batch))
+        self.sink.flush()
+
+    def wrap(self, name, fn):
+        """Return a traced version of a sync or async tool function"""
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def traced_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    self.record(name, args, kwargs, time.perf_counter() - start, error=e)
+                    raise
+                self.record(name, args, kwargs, time.perf_counter() - start, result=result)
+                return result
+            return traced_async
+
+        @wraps(fn)
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.record(name, args, kwargs, time.perf_counter() - start, error=e)
+                raise
+            self.record(name, args, kwargs, time.perf_counter() - start, result=result)
+            return result
+        return traced
+
+    def instrument(self, server):
+        """Trace every tool registered on a FastMCP server so far"""
+        for tool in server._tool_manager.list_tools():
+            tool.fn = self.wrap(tool.name, tool.fn)
+
+    def summary(self):
+        """Per-tool call counts, errors and latency histograms"""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            name: {
+                "calls": stats["calls"],
+                "errors": stats["errors"],
+                "mean_ms": stats["total_ms"] / stats["calls"],
+                "max_ms": stats["max_ms"],
+                "histogram": dict(zip(labels, stats["histogram"])),
+            }
+            for name, stats in sorted(self.stats.items())
+        }
+
+
+def tracer_from_env():
+    """Create a tracer configured by the environment
+
+    TOOL_TRACE_OUTPUT is "stderr" (default), "none" or a file path to append to;
+    TOOL_TRACE_SAMPLE, TOOL_TRACE_BATCH and TOOL_TRACE_CAPACITY tune the ring buffer.
+    """
+    output = os.getenv("TOOL_TRACE_OUTPUT", "stderr")
+    if output == "none":
+        sink = None
+    elif output == "stderr":
+        sink = sys.stderr
+    else:
+        sink = open(output, "a")
+    tracer = ToolTracer(
+        capacity=int(os.getenv("TOOL_TRACE_CAPACITY", "1024")),
+        sample_rate=float(os.getenv("TOOL_TRACE_SAMPLE", "1.0")),
+        batch_size=int(os.getenv("TOOL_TRACE_BATCH", "100")),
+        sink=sink,
+    )
+    # Export whatever is still pending when the server shuts down
+    atexit.register(tracer.flush)
+    return tracer